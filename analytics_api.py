@@ -0,0 +1,193 @@
+import gzip
+import hashlib
+import io
+import json
+import threading
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, request
+from backtester import random_weight_grid
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+NPZ_MIMETYPE = 'application/x-npz'
+JSON_MIMETYPE = 'application/json'
+MIN_GZIP_BYTES = 1024
+BACKTEST_STRATEGIES = 250
+
+
+class AnalyticsAPI:
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self._cache = {}
+        self._cache_version = None
+        self._lock = threading.Lock()
+        self.blueprint = Blueprint('analytics_api', __name__, url_prefix='/api/v1')
+        self.blueprint.add_url_rule('/summary', 'summary', self._endpoint(self.build_summary_table))
+        self.blueprint.add_url_rule('/correlation', 'correlation', self._endpoint(self.build_correlation_table))
+        self.blueprint.add_url_rule('/returns', 'returns', self._endpoint(self.build_returns_table))
+        self.blueprint.add_url_rule('/portfolio', 'portfolio', self._endpoint(self.build_portfolio_table))
+        self.blueprint.add_url_rule('/factors', 'factors', self._endpoint(self.build_factor_table))
+        self.blueprint.add_url_rule('/backtest', 'backtest', self._endpoint(self.build_backtest_table))
+
+    def register(self, server):
+        server.register_blueprint(self.blueprint)
+        return self
+
+    def data_version_key(self, analyzer=None):
+        analyzer = analyzer or self.analyzer
+        timestamp = analyzer.data_timestamp
+        return f"{analyzer.data_version}:{timestamp.isoformat() if timestamp else ''}"
+
+    def build_summary_table(self, analyzer):
+        summary = analyzer.get_stock_summary()
+        names = list(summary.keys())
+        columns = {'stock': np.array(names, dtype=object)}
+        fields = list(next(iter(summary.values())).keys()) if summary else []
+        for field in fields:
+            values = [summary[name][field] for name in names]
+            if field == 'symbol':
+                columns[field] = np.array(values, dtype=object)
+            else:
+                columns[field] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        return columns
+
+    def build_correlation_table(self, analyzer):
+        corr_matrix = analyzer.calculate_correlation_matrix()
+        columns = {'stock': np.array(corr_matrix.index, dtype=object)}
+        for name in corr_matrix.columns:
+            columns[name] = corr_matrix[name].to_numpy(dtype=np.float64)
+        return columns
+
+    def build_returns_table(self, analyzer):
+        returns_df = analyzer.calculate_returns()
+        index = pd.DatetimeIndex(returns_df.index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        columns = {'date': index.to_numpy(dtype='datetime64[ns]')}
+        for name in returns_df.columns:
+            columns[name] = returns_df[name].to_numpy(dtype=np.float64)
+        return columns
+
+    def build_portfolio_table(self, analyzer):
+        metrics = analyzer.calculate_portfolio_metrics()
+        return {
+            'metric': np.array(list(metrics.keys()), dtype=object),
+            'value': np.array([float(v) for v in metrics.values()], dtype=np.float64)
+        }
+
+    def build_factor_table(self, analyzer):
+        exposures = analyzer.calculate_factor_exposures()
+        columns = {'stock': np.array(exposures.index, dtype=object)}
+        for name in exposures.columns:
+            columns[name] = exposures[name].to_numpy(dtype=np.float64)
+        return columns
+
+    def build_backtest_table(self, analyzer):
+        # Equal weights plus a fixed random grid, rebalanced monthly
+        names = list(analyzer.stock_data.keys())
+        grid = random_weight_grid(len(names), BACKTEST_STRATEGIES, seed=0)
+        metrics = analyzer.backtest_strategies(grid)['metrics']
+        columns = {'strategy': np.array(metrics.index, dtype=object)}
+        for i, name in enumerate(names):
+            columns[f'weight_{name}'] = grid[:, i]
+        for name in metrics.columns:
+            columns[name] = metrics[name].to_numpy(dtype=np.float64)
+        return columns
+
+    def _negotiate_format(self):
+        fmt = request.args.get('format')
+        if fmt:
+            return fmt.lower()
+        best = request.accept_mimetypes.best_match([JSON_MIMETYPE, ARROW_MIMETYPE, NPZ_MIMETYPE],
+                                                   default=JSON_MIMETYPE)
+        return {ARROW_MIMETYPE: 'arrow', NPZ_MIMETYPE: 'npz'}.get(best, 'json')
+
+    def _encode(self, columns, fmt):
+        if fmt == 'json':
+            payload = {}
+            for name, values in columns.items():
+                if values.dtype.kind == 'M':
+                    payload[name] = [str(v)[:10] for v in values.astype('datetime64[D]')]
+                elif values.dtype.kind == 'f':
+                    payload[name] = [None if np.isnan(v) else float(v) for v in values]
+                else:
+                    payload[name] = [str(v) for v in values]
+            return json.dumps(payload, separators=(',', ':')).encode('utf-8'), JSON_MIMETYPE
+        if fmt == 'npz':
+            buffer = io.BytesIO()
+            np.savez(buffer, **{name: values.astype(str) if values.dtype == object else values
+                                for name, values in columns.items()})
+            return buffer.getvalue(), NPZ_MIMETYPE
+        if fmt == 'arrow':
+            table = pa.table({name: pa.array(values.tolist() if values.dtype == object else values)
+                              for name, values in columns.items()})
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes(), ARROW_MIMETYPE
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    def _get_payload(self, name, builder, fmt):
+        # Builders run on a snapshot so a ticker added mid-request can't
+        # leave them reading two different sets of stocks
+        analyzer = self.analyzer.snapshot()
+        version = self.data_version_key(analyzer)
+        with self._lock:
+            if self._cache_version != version:
+                self._cache = {}
+                self._cache_version = version
+            cached = self._cache.get((name, fmt))
+        if cached is not None:
+            return cached
+
+        body, mimetype = self._encode(builder(analyzer), fmt)
+        gzipped = gzip.compress(body, compresslevel=6) if len(body) >= MIN_GZIP_BYTES else None
+        etag = hashlib.sha1(f"{version}:{name}:{fmt}".encode('utf-8')).hexdigest()[:20]
+        payload = (body, gzipped, mimetype, etag)
+        with self._lock:
+            if self._cache_version == version:
+                self._cache[(name, fmt)] = payload
+        return payload
+
+    def _endpoint(self, builder):
+        name = builder.__name__
+
+        def view():
+            fmt = self._negotiate_format()
+            if fmt not in ('json', 'npz', 'arrow'):
+                return Response(json.dumps({'error': f"Unsupported format: {fmt}"}),
+                                status=400, mimetype=JSON_MIMETYPE)
+            if fmt == 'arrow' and pa is None:
+                return Response(json.dumps({'error': "Arrow output requires pyarrow to be installed"}),
+                                status=406, mimetype=JSON_MIMETYPE)
+            if not self.analyzer.stock_data:
+                return Response(json.dumps({'error': "No stock data loaded"}),
+                                status=503, mimetype=JSON_MIMETYPE)
+
+            body, gzipped, mimetype, etag = self._get_payload(name, builder, fmt)
+            use_gzip = gzipped is not None and 'gzip' in request.accept_encodings
+            if use_gzip:
+                etag = f"{etag}-gz"
+
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = Response(gzipped if use_gzip else body, mimetype=mimetype)
+                if use_gzip:
+                    response.headers['Content-Encoding'] = 'gzip'
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['Vary'] = 'Accept, Accept-Encoding'
+            return response
+
+        view.__name__ = f"{name}_view"
+        return view
+
+
+def register_analytics_api(server, analyzer):
+    return AnalyticsAPI(analyzer).register(server)
@@ -0,0 +1,211 @@
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    charts: {
+        component: function(namespace, type, props) {
+            return {namespace: namespace, type: type, props: props};
+        },
+
+        selectedIndices: function(names, selectedStocks) {
+            var keep = [];
+            names.forEach(function(name, i) {
+                if (selectedStocks.indexOf(name) !== -1) {
+                    keep.push(i);
+                }
+            });
+            return keep;
+        },
+
+        emptyFigure: function(message) {
+            return {
+                data: [],
+                layout: {
+                    annotations: [{
+                        text: message,
+                        xref: 'paper', yref: 'paper',
+                        x: 0.5, y: 0.5, showarrow: false
+                    }]
+                }
+            };
+        },
+
+        updateTimeSeries: function(store, chartType, selectedStocks, startDate, endDate) {
+            var charts = window.dash_clientside.charts;
+            if (!selectedStocks || selectedStocks.length === 0) {
+                return charts.emptyFigure('Please select at least one stock');
+            }
+            if (!store || !store.time_series) {
+                return charts.emptyFigure('Stock data is not available');
+            }
+            var source = store.time_series;
+            var normalize = chartType === 'normalized';
+            var start = startDate ? startDate.slice(0, 10) : null;
+            var end = endDate ? endDate.slice(0, 10) : null;
+            var data = source.data
+                .filter(function(trace) { return selectedStocks.indexOf(trace.name) !== -1; })
+                .map(function(trace) {
+                    var x = [], y = [];
+                    trace.x.forEach(function(date, i) {
+                        var day = date.slice(0, 10);
+                        if ((!start || day >= start) && (!end || day <= end)) {
+                            x.push(date);
+                            y.push(trace.y[i]);
+                        }
+                    });
+                    if (normalize) {
+                        var base = null;
+                        for (var i = 0; i < y.length && base === null; i++) {
+                            if (y[i] !== null) {
+                                base = y[i];
+                            }
+                        }
+                        y = y.map(function(v) { return v === null ? null : v / base * 100; });
+                    }
+                    return Object.assign({}, trace, {x: x, y: y});
+                });
+            var layout = Object.assign({}, source.layout, {
+                yaxis: Object.assign({}, source.layout.yaxis, {
+                    title: {text: normalize ? 'Normalized Price (Base = 100)' : 'Stock Price ($)'}
+                })
+            });
+            return {data: data, layout: layout};
+        },
+
+        updateCorrelationHeatmap: function(store, selectedStocks) {
+            var charts = window.dash_clientside.charts;
+            if (!selectedStocks || selectedStocks.length < 2) {
+                return charts.emptyFigure('Select at least 2 stocks for correlation analysis');
+            }
+            if (!store || !store.correlation) {
+                return charts.emptyFigure('Stock data is not available');
+            }
+            var source = store.correlation;
+            var heatmap = source.data[0];
+            var keep = [];
+            heatmap.x.forEach(function(name, i) {
+                if (selectedStocks.indexOf(name) !== -1) {
+                    keep.push(i);
+                }
+            });
+            var pick = function(row) { return keep.map(function(j) { return row[j]; }); };
+            var subset = Object.assign({}, heatmap, {
+                x: pick(heatmap.x),
+                y: pick(heatmap.y),
+                z: pick(heatmap.z).map(pick),
+                text: pick(heatmap.text).map(pick)
+            });
+            return {data: [subset], layout: source.layout};
+        },
+
+        updateVolatilityChart: function(store, selectedStocks) {
+            var charts = window.dash_clientside.charts;
+            if (!selectedStocks || selectedStocks.length === 0) {
+                return charts.emptyFigure('Please select at least one stock');
+            }
+            if (!store || !store.volatility) {
+                return charts.emptyFigure('Stock data is not available');
+            }
+            var source = store.volatility;
+            var trace = source.data[0];
+            var keep = charts.selectedIndices(trace.text, selectedStocks);
+            var pick = function(values) {
+                return Array.isArray(values) ? keep.map(function(i) { return values[i]; }) : values;
+            };
+            var marker = Object.assign({}, trace.marker, {
+                size: pick(trace.marker.size),
+                color: pick(trace.marker.color)
+            });
+            var subset = Object.assign({}, trace, {
+                x: pick(trace.x),
+                y: pick(trace.y),
+                text: pick(trace.text),
+                customdata: pick(trace.customdata),
+                marker: marker
+            });
+            return {data: [subset], layout: source.layout};
+        },
+
+        updatePerformanceMetrics: function(store, selectedStocks) {
+            var charts = window.dash_clientside.charts;
+            if (!selectedStocks || selectedStocks.length === 0) {
+                return charts.emptyFigure('Please select stocks to view performance metrics');
+            }
+            if (!store || !store.performance) {
+                return charts.emptyFigure('Stock data is not available');
+            }
+            var source = store.performance;
+            var data = source.data.map(function(trace) {
+                var keep = charts.selectedIndices(trace.x, selectedStocks);
+                var pick = function(values) { return keep.map(function(i) { return values[i]; }); };
+                return Object.assign({}, trace, {x: pick(trace.x), y: pick(trace.y)});
+            });
+            return {data: data, layout: source.layout};
+        },
+
+        updateWindowStats: function(store, selectedStocks) {
+            var charts = window.dash_clientside.charts;
+            var c = charts.component;
+            if (!selectedStocks || selectedStocks.length === 0 || !store || !store.window_stats) {
+                return c('dash_html_components', 'Div', {});
+            }
+            var stats = store.window_stats;
+            var header = c('dash_html_components', 'Thead', {
+                children: c('dash_html_components', 'Tr', {
+                    children: stats.columns.map(function(column) {
+                        return c('dash_html_components', 'Th', {children: column});
+                    })
+                })
+            });
+            var rows = selectedStocks
+                .filter(function(name) { return stats.rows[name]; })
+                .map(function(name) {
+                    return c('dash_html_components', 'Tr', {
+                        children: stats.rows[name].map(function(value) {
+                            return c('dash_html_components', 'Td', {children: value});
+                        })
+                    });
+                });
+            var table = c('dash_bootstrap_components', 'Table', {
+                children: [header, c('dash_html_components', 'Tbody', {children: rows})],
+                striped: true, bordered: false, hover: true, responsive: true,
+                size: 'sm', className: 'mb-0'
+            });
+            return c('dash_bootstrap_components', 'Card', {
+                children: [
+                    c('dash_bootstrap_components', 'CardHeader', {
+                        children: c('dash_html_components', 'H5', {children: stats.title, className: 'mb-0'})
+                    }),
+                    c('dash_bootstrap_components', 'CardBody', {children: table})
+                ]
+            });
+        },
+
+        updateSummaryStats: function(store, selectedStocks) {
+            var c = window.dash_clientside.charts.component;
+            if (!selectedStocks || selectedStocks.length === 0) {
+                return c('dash_html_components', 'Div', {
+                    children: 'Please select stocks to view summary statistics'
+                });
+            }
+            var cards = (store && store.summary_cards) || {};
+            var xl = Math.floor(12 / Math.min(selectedStocks.length, 4));
+            var selected = selectedStocks
+                .filter(function(name) { return cards[name]; })
+                .map(function(name) {
+                    var card = cards[name];
+                    return Object.assign({}, card, {props: Object.assign({}, card.props, {xl: xl})});
+                });
+            return c('dash_bootstrap_components', 'Card', {
+                children: [
+                    c('dash_bootstrap_components', 'CardHeader', {
+                        children: c('dash_html_components', 'H5', {
+                            children: '📊 Advanced Risk Metrics & Performance Statistics',
+                            className: 'mb-0'
+                        })
+                    }),
+                    c('dash_bootstrap_components', 'CardBody', {
+                        children: c('dash_bootstrap_components', 'Row', {children: selected})
+                    })
+                ]
+            });
+        }
+    }
+});
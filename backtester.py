@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from drawdown_analyzer import DrawdownAnalyzer
+
+REBALANCE_FREQUENCIES = ('daily', 'weekly', 'monthly', 'threshold')
+
+
+def random_weight_grid(n_assets, n_strategies, seed=None):
+    rng = np.random.default_rng(seed)
+    grid = rng.dirichlet(np.ones(n_assets), size=n_strategies)
+    grid[0] = 1 / n_assets
+    return grid
+
+
+def _run_chunk(args):
+    returns_df, weights, kwargs = args
+    backtester = Backtester(returns_df, kwargs.pop('risk_free_rate'), kwargs.pop('start_date'))
+    return backtester.run(weights, **kwargs)
+
+
+class Backtester:
+    def __init__(self, returns_df, risk_free_rate=0.0, start_date=None):
+        self.returns_df = returns_df.fillna(0.0)
+        self.risk_free_rate = risk_free_rate
+        self.start_date = start_date if start_date is not None else \
+            returns_df.index[0] - pd.Timedelta(days=1)
+
+    def rebalance_schedule(self, frequency):
+        if frequency not in REBALANCE_FREQUENCIES:
+            raise ValueError(f"Unknown rebalance frequency: {frequency}")
+        dates = pd.DatetimeIndex(self.returns_df.index)
+        if frequency == 'daily':
+            return np.ones(len(dates), dtype=bool)
+        if frequency == 'threshold':
+            return np.zeros(len(dates), dtype=bool)
+        if frequency == 'weekly':
+            period = (dates.normalize() - pd.to_timedelta(dates.weekday, unit='D')).asi8
+        else:
+            period = np.asarray(dates.year * 12 + dates.month)
+        # Rebalance at the close of the last trading day of each period
+        return np.append(period[1:] != period[:-1], False)
+
+    def run(self, weights, frequency='monthly', threshold=0.05, transaction_cost=0.001,
+            strategy_names=None, keep_weights=False):
+        targets = np.atleast_2d(np.asarray(weights, dtype=float))
+        targets = targets / targets.sum(axis=1, keepdims=True)
+        asset_returns = self.returns_df.to_numpy(dtype=float)
+        n_dates = asset_returns.shape[0]
+        n_strategies = targets.shape[0]
+        schedule = self.rebalance_schedule(frequency)
+
+        holdings = targets.copy()
+        strategy_returns = np.empty((n_strategies, n_dates))
+        turnover = np.zeros((n_strategies, n_dates))
+        weight_history = np.empty((n_strategies, n_dates, targets.shape[1])) if keep_weights else None
+
+        # Sequential in time (weights drift path-dependently), vectorized
+        # across the strategies x assets block on every step
+        for t in range(n_dates):
+            if keep_weights:
+                weight_history[:, t] = holdings
+            grown = holdings * (1 + asset_returns[t])
+            gross = grown.sum(axis=1)
+            drifted = grown / gross[:, None]
+
+            if frequency == 'threshold':
+                rebalance = np.abs(drifted - targets).max(axis=1) > threshold
+            else:
+                rebalance = np.full(n_strategies, schedule[t])
+            traded = np.where(rebalance, np.abs(targets - drifted).sum(axis=1), 0.0)
+
+            turnover[:, t] = traded
+            strategy_returns[:, t] = gross * (1 - traded * transaction_cost) - 1
+            holdings = np.where(rebalance[:, None], targets, drifted)
+
+        if strategy_names is None:
+            strategy_names = [f"Strategy {i + 1}" for i in range(n_strategies)]
+        returns = pd.DataFrame(strategy_returns.T, index=self.returns_df.index, columns=strategy_names)
+        start = pd.DataFrame([np.ones(n_strategies)], columns=strategy_names,
+                             index=[self.start_date])
+        equity_curves = pd.concat([start, (1 + returns).cumprod()])
+
+        result = {
+            'equity_curves': equity_curves,
+            'returns': returns,
+            'turnover': pd.DataFrame(turnover.T, index=self.returns_df.index, columns=strategy_names),
+            'metrics': self.calculate_metrics(returns, equity_curves, targets, turnover)
+        }
+        if keep_weights:
+            result['weights'] = weight_history
+        return result
+
+    def calculate_metrics(self, returns, equity_curves, targets, turnover):
+        values = returns.to_numpy()
+        mean = values.mean(axis=0)
+        std = values.std(axis=0, ddof=1)
+        asset_vols = self.returns_df.std().to_numpy() * np.sqrt(250)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(std != 0, (mean * 252 - self.risk_free_rate) / (std * np.sqrt(252)), 0)
+            diversification = np.where(std != 0, (targets * asset_vols).sum(axis=1) / (std * np.sqrt(250)), 1)
+
+        return pd.DataFrame({
+            'portfolio_return': mean * 250 * 100,
+            'portfolio_volatility': std * np.sqrt(250) * 100,
+            'portfolio_sharpe': sharpe,
+            'portfolio_var': np.percentile(values, 5, axis=0) * 100,
+            'portfolio_max_drawdown': DrawdownAnalyzer(equity_curves).calculate_max_drawdown().to_numpy(),
+            'diversification_ratio': diversification,
+            'annual_turnover': turnover.sum(axis=1) / len(values) * 250 * 100
+        }, index=returns.columns)
+
+    def run_grid(self, weights_grid, max_workers=None, chunk_size=250, **kwargs):
+        weights_grid = np.atleast_2d(np.asarray(weights_grid, dtype=float))
+        names = kwargs.pop('strategy_names', None) or \
+            [f"Strategy {i + 1}" for i in range(len(weights_grid))]
+        if len(weights_grid) <= chunk_size:
+            return self.run(weights_grid, strategy_names=names, **kwargs)
+
+        kwargs['risk_free_rate'] = self.risk_free_rate
+        kwargs['start_date'] = self.start_date
+        chunks = [
+            (self.returns_df, weights_grid[i:i + chunk_size],
+             dict(kwargs, strategy_names=names[i:i + chunk_size]))
+            for i in range(0, len(weights_grid), chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_run_chunk, chunks))
+
+        combined = {
+            key: pd.concat([r[key] for r in results], axis=1)
+            for key in ('equity_curves', 'returns', 'turnover')
+        }
+        combined['metrics'] = pd.concat([r['metrics'] for r in results])
+        if kwargs.get('keep_weights'):
+            combined['weights'] = np.concatenate([r['weights'] for r in results])
+        return combined
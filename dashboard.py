@@ -1,12 +1,31 @@
+import os
+from datetime import timedelta
 import dash
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, ClientsideFunction, callback, no_update
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 from stock_analyzer import StockAnalyzer
+from analytics_api import register_analytics_api
+from ticker_loader import TickerLoader
+from factor_model import SECTOR_FACTORS
+from scenario_engine import DEFAULT_FACTOR_SHOCKS
 import pandas as pd
 
-# Initialize the stock analyzer
-analyzer = StockAnalyzer()
+# One long stored history; the date-range selector picks the analysis window
+HISTORY_PERIOD = '10y'
+DEFAULT_WINDOW_DAYS = 730
+# Tickers selected on page load when a memory budget is set
+BUDGET_DEFAULT_SELECTION = 4
+SHORT_WINDOW_MESSAGE = "Not enough data in this window, please select a longer analysis window"
+
+# Initialize the stock analyzer (set STOCK_MEMORY_BUDGET_MB to keep only recently
+# used tickers resident and load the rest from the local store on demand)
+memory_budget_mb = os.environ.get('STOCK_MEMORY_BUDGET_MB')
+analyzer = StockAnalyzer(
+    memory_budget_mb=float(memory_budget_mb) if memory_budget_mb else None,
+    cache_dir=os.environ.get('STOCK_CACHE_DIR', '.stock_cache')
+)
+budget_mode = bool(memory_budget_mb)
 
 # Initialize Dash app with Bootstrap theme and mobile optimization
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
@@ -41,220 +60,590 @@ h1 { font-size: 1.5rem !important; }
 # Fetch data on startup with error handling
 print("Initializing dashboard...")
 try:
-    if analyzer.fetch_stock_data(period='2y'):
+    if analyzer.fetch_stock_data(period=HISTORY_PERIOD):
         print("✓ Data loaded successfully!")
+        print(f"Memory in use: {analyzer.get_memory_usage()['used_mb']:.1f} MB")
     else:
         print("⚠️ Some data failed to load, continuing with available data")
 except Exception as e:
     print(f"⚠️ Data loading error: {e}")
     print("Dashboard will continue with limited functionality")
 
-#Template layout
-app.layout = dbc.Container([
-    dbc.Row([
-        dbc.Col([
-            html.H1("📈 Stock Market Analysis", 
-                   className="text-center mb-3 mb-md-4",
-                   style={'color': '#2c3e50', 'fontWeight': 'bold', 'fontSize': 'clamp(1.25rem, 4vw, 2rem)'})
-        ])
-    ], className="mb-2 mb-md-3"),
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Dashboard Controls", className="card-title mb-3"),
-                    dbc.Row([
-                        dbc.Col([
-                            html.Label("Chart Type:", className="fw-bold mb-2"),
-                            dcc.Dropdown(
-                                id='chart-type-dropdown',
-                                options=[
-                                    {'label': 'Normalized Prices', 'value': 'normalized'},
-                                    {'label': 'Actual Prices', 'value': 'actual'}
-                                ],
-                                value='normalized',
-                                clearable=False,
-                                style={'fontSize': '0.9rem'}
-                            )
-                        ], width=12, md=6, className="mb-3 mb-md-0"),
-                        dbc.Col([
-                            html.Label("Select Stocks:", className="fw-bold mb-2"),
-                            dcc.Dropdown(
-                                id='stock-selector',
-                                options=[{'label': name, 'value': name} 
-                                        for name in analyzer.major_stocks.keys()],
-                                value=list(analyzer.major_stocks.keys()),
-                                multi=True,
-                                style={'fontSize': '0.9rem'}
-                            )
-                        ], width=12, md=6)
+def select_stock_data(view, selected_stocks, start_date=None, end_date=None):
+    selected = {}
+    for name in selected_stocks:
+        if name in view.stock_data:
+            data = view.stock_data[name].loc[start_date:end_date]
+            if len(data) > 1:
+                selected[name] = data
+    return selected
+
+def session_view(selected_stocks):
+    # With a memory budget, server-side work only touches the selected tickers
+    # so a large universe is browsed a few names at a time; otherwise it covers
+    # every ticker once and selection is filtered clientside
+    if budget_mode:
+        return analyzer.snapshot(names=selected_stocks or [])
+    return analyzer.snapshot()
+
+def create_summary_card(stock, data):
+    return_color = "success" if data['total_return'] > 0 else "danger"
+    sharpe_color = "success" if data['sharpe_ratio'] > 1 else "warning" if data['sharpe_ratio'] > 0.5 else "danger"
+
+    return dbc.Col([
+        dbc.Card([
+            dbc.CardBody([
+                html.H5(f"{stock} ({data['symbol']})", 
+                       className="card-title text-center"),
+                html.Hr(),
+                html.P([
+                    html.Strong("Current Price: "),
+                    f"${data['current_price']:.2f}"
+                ], className="mb-1"),
+                html.P([
+                    html.Strong("Total Return: "),
+                    html.Span(f"{data['total_return']:.1f}%",
+                            className=f"text-{return_color}")
+                ], className="mb-1"),
+                html.P([
+                    html.Strong("Annualized Return: "),
+                    f"{data['annualized_return']:.1f}%"
+                ], className="mb-1"),
+                html.P([
+                    html.Strong("Volatility: "),
+                    f"{data['volatility']:.1f}%"
+                ], className="mb-1"),
+                html.P([
+                    html.Strong("Sharpe Ratio: "),
+                    html.Span(f"{data['sharpe_ratio']:.2f}",
+                            className=f"text-{sharpe_color}")
+                ], className="mb-1"),
+                html.P([
+                    html.Strong("Max Drawdown: "),
+                    f"{data['max_drawdown']:.1f}%"
+                ], className="mb-1"),
+                html.P([
+                    html.Strong("VaR (95%): "),
+                    f"{data['var_95']:.1f}%"
+                ], className="mb-1"),
+                html.P([
+                    html.Strong("Win Rate: "),
+                    f"{data['win_rate']:.1f}%"
+                ], className="mb-1"),
+                html.P([
+                    html.Strong("Beta: "),
+                    f"{data['beta']:.2f}" if data['beta'] else "N/A"
+                ], className="mb-0")
+            ])
+        ], className="h-100")
+    ], width=12, md=6, lg=4, className="mb-3 mb-lg-0")
+
+# Tickers typed into the dashboard load on a small background pool so the
+# request threads serving other sessions never wait on a download
+ticker_loader = TickerLoader(analyzer)
+
+#Template layout, served per page load so tickers added at runtime appear
+def serve_layout():
+    # Bounds come from the current tickers so history added after startup is pickable
+    view = analyzer.snapshot()
+    history_start, history_end = view.get_history_bounds()
+    window_start = max(history_start, history_end - timedelta(days=DEFAULT_WINDOW_DAYS)) \
+        if history_end else None
+    names = list(view.stock_data.keys())
+    selected_stocks = names[:BUDGET_DEFAULT_SELECTION] if budget_mode else names
+    return dbc.Container([
+        dcc.Store(id='chart-store', data=session_view(selected_stocks).get_chart_store_data()),
+        dcc.Store(id='correlation-store'),
+        dcc.Store(id='metrics-store'),
+        dcc.Store(id='ticker-jobs', data=[]),
+        dcc.Interval(id='ticker-poll', interval=1000, disabled=True),
+        dbc.Row([
+            dbc.Col([
+                html.H1("📈 Stock Market Analysis", 
+                       className="text-center mb-3 mb-md-4",
+                       style={'color': '#2c3e50', 'fontWeight': 'bold', 'fontSize': 'clamp(1.25rem, 4vw, 2rem)'})
+            ])
+        ], className="mb-2 mb-md-3"),
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Dashboard Controls", className="card-title mb-3"),
+                        dbc.Row([
+                            dbc.Col([
+                                html.Label("Chart Type:", className="fw-bold mb-2"),
+                                dcc.Dropdown(
+                                    id='chart-type-dropdown',
+                                    options=[
+                                        {'label': 'Normalized Prices', 'value': 'normalized'},
+                                        {'label': 'Actual Prices', 'value': 'actual'}
+                                    ],
+                                    value='normalized',
+                                    clearable=False,
+                                    style={'fontSize': '0.9rem'}
+                                )
+                            ], width=12, md=3, className="mb-3 mb-md-0"),
+                            dbc.Col([
+                                html.Label("Analysis Window:", className="fw-bold mb-2"),
+                                dcc.DatePickerRange(
+                                    id='date-range',
+                                    min_date_allowed=history_start,
+                                    max_date_allowed=history_end,
+                                    start_date=window_start,
+                                    end_date=history_end,
+                                    display_format='YYYY-MM-DD',
+                                    style={'fontSize': '0.9rem'}
+                                )
+                            ], width=12, md=4, className="mb-3 mb-md-0"),
+                            dbc.Col([
+                                html.Label("Select Stocks:", className="fw-bold mb-2"),
+                                dcc.Dropdown(
+                                    id='stock-selector',
+                                    options=[{'label': name, 'value': name} 
+                                            for name in names],
+                                    value=selected_stocks,
+                                    multi=True,
+                                    style={'fontSize': '0.9rem'}
+                                )
+                            ], width=12, md=5)
+                        ]),
+                        dbc.Row([
+                            dbc.Col([
+                                html.Label("Add Ticker:", className="fw-bold mb-2"),
+                                dbc.InputGroup([
+                                    dbc.Input(id='add-ticker-input', type='text', placeholder='e.g. AMD',
+                                              debounce=False, style={'fontSize': '0.9rem'}),
+                                    dbc.Button("Add", id='add-ticker-button', color='primary', n_clicks=0)
+                                ], size='sm')
+                            ], width=12, md=4, className="mb-2 mb-md-0"),
+                            dbc.Col([
+                                html.Div(id='add-ticker-status', className="small text-muted mt-md-4")
+                            ], width=12, md=8)
+                        ], className="mt-3")
+                    ])
+                ], className="mb-3 mb-md-4")
+            ])
+        ]),
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(
+                    id='time-series-chart',
+                    config={
+                        'displayModeBar': False, 
+                        'responsive': True,
+                        'toImageButtonOptions': {'format': 'png', 'filename': 'stock_analysis'},
+                        'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d']
+                    }
+                )
+            ], width=12)
+        ], className="mb-4 mb-md-5"),
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(
+                    id='correlation-heatmap',
+                    config={
+                        'displayModeBar': False,
+                        'responsive': True
+                    }
+                )
+            ], width=12, lg=6, className="mb-4 mb-lg-0"),
+            dbc.Col([
+                dcc.Graph(
+                    id='volatility-chart',
+                    config={
+                        'displayModeBar': False,
+                        'responsive': True
+                    }
+                )
+            ], width=12, lg=6)
+        ], className="mb-4 mb-md-5"),
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(
+                    id='performance-metrics-chart',
+                    config={
+                        'displayModeBar': False,
+                        'responsive': True
+                    }
+                )
+            ], width=12)
+        ], className="mb-4 mb-md-5"),
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(
+                    id='underwater-chart',
+                    config={
+                        'displayModeBar': False,
+                        'responsive': True
+                    }
+                )
+            ], width=12, lg=8, className="mb-4 mb-lg-0"),
+            dbc.Col([
+                html.Div(id='drawdown-summary')
+            ], width=12, lg=4)
+        ], className="mb-4 mb-md-5"),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("⚡ Scenario & Stress Testing (Equal-Weighted, Full History)", className="mb-0")
+                    ]),
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([
+                                html.Label("Shock Factor:", className="fw-bold mb-2"),
+                                dcc.Dropdown(
+                                    id='stress-factor',
+                                    options=[{'label': name, 'value': name}
+                                            for name in ['Market'] + list(SECTOR_FACTORS.keys())],
+                                    value='Technology',
+                                    clearable=False,
+                                    style={'fontSize': '0.9rem'}
+                                )
+                            ], width=12, md=4, className="mb-3 mb-md-0"),
+                            dbc.Col([
+                                html.Label("Shock Size (%):", className="fw-bold mb-2"),
+                                dbc.Input(id='stress-shock', type='number', value=-20, step=1,
+                                          debounce=True, style={'fontSize': '0.9rem'})
+                            ], width=12, md=4, className="mb-3 mb-md-0"),
+                            dbc.Col([
+                                html.Div(id='stress-summary', className="small")
+                            ], width=12, md=4)
+                        ], className="mb-3"),
+                        dcc.Graph(
+                            id='stress-chart',
+                            config={
+                                'displayModeBar': False,
+                                'responsive': True
+                            }
+                        )
                     ])
                 ])
-            ], className="mb-3 mb-md-4")
-        ])
-    ]),
-    dbc.Row([
-        dbc.Col([
-            dcc.Graph(
-                id='time-series-chart',
-                config={
-                    'displayModeBar': False, 
-                    'responsive': True,
-                    'toImageButtonOptions': {'format': 'png', 'filename': 'stock_analysis'},
-                    'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d']
-                }
-            )
-        ], width=12)
-    ], className="mb-4 mb-md-5"),
-    dbc.Row([
-        dbc.Col([
-            dcc.Graph(
-                id='correlation-heatmap',
-                config={
-                    'displayModeBar': False,
-                    'responsive': True
-                }
-            )
-        ], width=12, lg=6, className="mb-4 mb-lg-0"),
-        dbc.Col([
-            dcc.Graph(
-                id='volatility-chart',
-                config={
-                    'displayModeBar': False,
-                    'responsive': True
-                }
-            )
-        ], width=12, lg=6)
-    ], className="mb-4 mb-md-5"),
-    dbc.Row([
-        dbc.Col([
-            dcc.Graph(
-                id='performance-metrics-chart',
-                config={
-                    'displayModeBar': False,
-                    'responsive': True
-                }
-            )
-        ], width=12)
-    ], className="mb-4 mb-md-5"),
-
-    dbc.Row([
-        dbc.Col([
-            html.Div(id='portfolio-summary')
-        ], width=12)
-    ], className="mb-3 mb-md-4"),
-    dbc.Row([
-        dbc.Col([
-            html.Div(id='summary-stats')
+            ], width=12)
+        ], className="mb-4 mb-md-5"),
+        dbc.Row([
+            dbc.Col([
+                html.Div(id='window-stats')
+            ], width=12)
+        ], className="mb-3 mb-md-4"),
+        dbc.Row([
+            dbc.Col([
+                html.Div(id='portfolio-summary')
+            ], width=12)
+        ], className="mb-3 mb-md-4"),
+        dbc.Row([
+            dbc.Col([
+                html.Div(id='summary-stats')
+            ])
         ])
-    ])
     
-], fluid=True, className="mobile-dashboard")
+    ], fluid=True, className="mobile-dashboard")
 
-@app.callback(
+app.layout = serve_layout
+
+# Normalization, stock filtering and correlation subsetting run in the browser
+# (assets/dashboard.js) against the raw figures shipped once in chart-store.
+app.clientside_callback(
+    ClientsideFunction(namespace='charts', function_name='updateTimeSeries'),
     Output('time-series-chart', 'figure'),
-    [Input('chart-type-dropdown', 'value'),
+    [Input('chart-store', 'data'),
+     Input('chart-type-dropdown', 'value'),
+     Input('stock-selector', 'value'),
+     Input('date-range', 'start_date'),
+     Input('date-range', 'end_date')]
+)
+
+app.clientside_callback(
+    ClientsideFunction(namespace='charts', function_name='updateCorrelationHeatmap'),
+    Output('correlation-heatmap', 'figure'),
+    [Input('correlation-store', 'data'),
+     Input('stock-selector', 'value')]
+)
+
+# Per-ticker panels don't depend on which other stocks are selected: they are
+# computed for every ticker once per window (metrics-store) and filtered here
+app.clientside_callback(
+    ClientsideFunction(namespace='charts', function_name='updateVolatilityChart'),
+    Output('volatility-chart', 'figure'),
+    [Input('metrics-store', 'data'),
+     Input('stock-selector', 'value')]
+)
+
+app.clientside_callback(
+    ClientsideFunction(namespace='charts', function_name='updatePerformanceMetrics'),
+    Output('performance-metrics-chart', 'figure'),
+    [Input('metrics-store', 'data'),
+     Input('stock-selector', 'value')]
+)
+
+app.clientside_callback(
+    ClientsideFunction(namespace='charts', function_name='updateWindowStats'),
+    Output('window-stats', 'children'),
+    [Input('metrics-store', 'data'),
+     Input('stock-selector', 'value')]
+)
+
+app.clientside_callback(
+    ClientsideFunction(namespace='charts', function_name='updateSummaryStats'),
+    Output('summary-stats', 'children'),
+    [Input('metrics-store', 'data'),
      Input('stock-selector', 'value')]
 )
-def update_time_series(chart_type, selected_stocks):
-    if not selected_stocks:
-        return go.Figure().add_annotation(
-            text="Please select at least one stock",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-    filtered_data = {name: data for name, data in analyzer.stock_data.items() 
-                    if name in selected_stocks}
-
-    original_data = analyzer.stock_data
-    analyzer.stock_data = filtered_data
-    normalize = chart_type == 'normalized'
-    fig = analyzer.create_time_series_chart(normalize=normalize)
-    analyzer.stock_data = original_data
-    
-    return fig
 
 @app.callback(
-    Output('correlation-heatmap', 'figure'),
-    [Input('stock-selector', 'value')]
+    [Output('ticker-jobs', 'data'),
+     Output('ticker-poll', 'disabled'),
+     Output('add-ticker-input', 'value'),
+     Output('add-ticker-status', 'children', allow_duplicate=True)],
+    [Input('add-ticker-button', 'n_clicks'),
+     Input('add-ticker-input', 'n_submit')],
+    [State('add-ticker-input', 'value'),
+     State('ticker-jobs', 'data')],
+    prevent_initial_call=True
 )
-def update_correlation_heatmap(selected_stocks):
-    if not selected_stocks or len(selected_stocks) < 2:
-        return go.Figure().add_annotation(
-            text="Select at least 2 stocks for correlation analysis",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-    
-    # Filter data for selected stocks
-    filtered_data = {name: data for name, data in analyzer.stock_data.items() 
-                    if name in selected_stocks}
-
-    original_data = analyzer.stock_data
-    analyzer.stock_data = filtered_data
-    fig = analyzer.create_correlation_heatmap()
-    analyzer.stock_data = original_data
-    
-    return fig
+def submit_ticker(n_clicks, n_submit, symbol, jobs):
+    if not symbol or not symbol.strip():
+        return no_update, no_update, no_update, no_update
+    try:
+        job_id = ticker_loader.submit(symbol)
+    except ValueError as e:
+        return no_update, no_update, no_update, html.Span(str(e), className="text-danger")
+    jobs = jobs or []
+    # Resubmitting a symbol that is still loading returns its existing job
+    if all(job['id'] != job_id for job in jobs):
+        jobs = jobs + [{'id': job_id, 'symbol': symbol.strip().upper(), 'applied': False}]
+    return jobs, False, '', f"{symbol.strip().upper()}: queued"
 
+# Polled only while loads are in flight; finished tickers are merged into the
+# selector and chart-store, which refreshes every dependent chart
 @app.callback(
-    Output('volatility-chart', 'figure'),
-    [Input('stock-selector', 'value')]
+    [Output('add-ticker-status', 'children'),
+     Output('ticker-jobs', 'data', allow_duplicate=True),
+     Output('ticker-poll', 'disabled', allow_duplicate=True),
+     Output('stock-selector', 'options'),
+     Output('stock-selector', 'value'),
+     Output('chart-store', 'data')],
+    Input('ticker-poll', 'n_intervals'),
+    [State('ticker-jobs', 'data'),
+     State('stock-selector', 'value')],
+    prevent_initial_call=True
+)
+def poll_ticker_jobs(n_intervals, jobs, selected_stocks):
+    jobs = jobs or []
+    status = ticker_loader.get_status([job['id'] for job in jobs])
+    pending = [job for job in jobs if not job['applied']]
+    if not pending:
+        return no_update, no_update, True, no_update, no_update, no_update
+
+    messages, added = [], []
+    for job in pending:
+        info = status.get(job['id'])
+        if info is None:
+            # The worker that ran this job was restarted; finished loads are
+            # restored from the store, unfinished ones need resubmitting
+            symbol = job.get('symbol', 'Ticker')
+            job['applied'] = True
+            if symbol in analyzer.stock_data:
+                messages.append(html.Div(f"{symbol}: loaded", className="text-success"))
+                added.append(symbol)
+            else:
+                messages.append(html.Div(f"{symbol}: load was interrupted by a server restart, "
+                                         "please add it again", className="text-danger"))
+            continue
+        if info['status'] == 'error':
+            messages.append(html.Div(info['message'], className="text-danger"))
+            job['applied'] = True
+        elif info['status'] == 'done':
+            messages.append(html.Div(info['message'], className="text-success"))
+            job['applied'] = True
+            added.append(info['name'])
+        else:
+            messages.append(html.Div(f"{info['message']} ({info['progress']}%)"))
+
+    finished = all(job['applied'] for job in jobs)
+    if not added:
+        return messages, jobs, finished, no_update, no_update, no_update
+
+    view = analyzer.snapshot()
+    selected_stocks = list(selected_stocks or [])
+    selected_stocks += [name for name in dict.fromkeys(added) if name in view.stock_data
+                        and name not in selected_stocks]
+    options = [{'label': name, 'value': name} for name in view.stock_data.keys()]
+    return (messages, jobs, finished, options, selected_stocks,
+            session_view(selected_stocks).get_chart_store_data())
+
+# In budget mode the stores only hold the selected tickers, so a selection
+# change refreshes the chart-store and, through it, the window stores
+if budget_mode:
+    @app.callback(
+        Output('chart-store', 'data', allow_duplicate=True),
+        Input('stock-selector', 'value'),
+        prevent_initial_call=True
+    )
+    def update_chart_store(selected_stocks):
+        return session_view(selected_stocks).get_chart_store_data()
+
+# Window correlations come from the prefix-sum index in O(N^2), without
+# slicing the return series; stock subsetting stays clientside
+@app.callback(
+    Output('correlation-store', 'data'),
+    [Input('date-range', 'start_date'),
+     Input('date-range', 'end_date'),
+     Input('chart-store', 'data')],
+    State('stock-selector', 'value')
+)
+def update_correlation_store(start_date, end_date, chart_store, selected_stocks):
+    return session_view(selected_stocks).get_correlation_store_data(start_date, end_date)
+
+@app.callback(
+    Output('metrics-store', 'data'),
+    [Input('date-range', 'start_date'),
+     Input('date-range', 'end_date'),
+     Input('chart-store', 'data')],
+    State('stock-selector', 'value')
+)
+def update_metrics_store(start_date, end_date, chart_store, selected_stocks):
+    view = session_view(selected_stocks)
+    names = list(view.stock_data.keys())
+    if not names:
+        return {}
+
+    stats = view.get_window_statistics(start_date, end_date, names)
+    if not (start_date and end_date):
+        history_start, history_end = view.get_history_bounds()
+        start_date = start_date or history_start.isoformat()
+        end_date = end_date or history_end.isoformat()
+    window = view.subset(select_stock_data(view, names, start_date, end_date))
+    summary = window.get_stock_summary()
+    table = pd.DataFrame({
+        'Stock': stats.index,
+        'Total Return': stats['total_return'].map(lambda r: f"{r:.1f}%" if pd.notna(r) else "N/A"),
+        'Annualized Return': stats['annualized_return'].map(lambda r: f"{r:.1f}%" if pd.notna(r) else "N/A"),
+        'Volatility': stats['volatility'].map(lambda v: f"{v:.1f}%" if pd.notna(v) else "N/A"),
+        'Sharpe Ratio': stats['sharpe_ratio'].map(lambda s: f"{s:.2f}" if pd.notna(s) else "N/A"),
+        'Beta': stats['beta'].map(lambda b: f"{b:.2f}" if pd.notna(b) else "N/A"),
+        'Trading Days': stats['trading_days'].astype(str)
+    })
+
+    return {
+        'data_version': view.data_version,
+        'volatility': view.figure_to_store(view.create_volatility_chart(summary=stats.to_dict('index'))),
+        'performance': view.figure_to_store(window.create_performance_metrics_chart(summary))
+                       if summary else None,
+        'window_stats': {
+            'title': f"🗓️ Window Statistics ({start_date} to {end_date})",
+            'columns': list(table.columns),
+            'rows': {row[0]: list(row) for row in table.itertuples(index=False)}
+        },
+        'summary_cards': {stock: create_summary_card(stock, data) for stock, data in summary.items()}
+    }
+
+@app.callback(
+    [Output('underwater-chart', 'figure'),
+     Output('drawdown-summary', 'children')],
+    [Input('stock-selector', 'value'),
+     Input('date-range', 'start_date'),
+     Input('date-range', 'end_date')]
 )
-def update_volatility_chart(selected_stocks):
+def update_drawdown_analysis(selected_stocks, start_date, end_date):
     if not selected_stocks:
         return go.Figure().add_annotation(
-            text="Please select at least one stock",
+            text="Please select stocks to view drawdown analysis",
             xref="paper", yref="paper",
             x=0.5, y=0.5, showarrow=False
-        )
- 
-    filtered_data = {name: data for name, data in analyzer.stock_data.items() 
-                    if name in selected_stocks}
-
-    original_data = analyzer.stock_data
-    analyzer.stock_data = filtered_data
-    fig = analyzer.create_volatility_chart()
-    analyzer.stock_data = original_data
-    
-    return fig
+        ), html.Div()
+
+    view = analyzer.snapshot()
+    window_data = select_stock_data(view, selected_stocks, start_date, end_date)
+    if not window_data:
+        return go.Figure().add_annotation(
+            text=SHORT_WINDOW_MESSAGE,
+            xref="paper", yref="paper",
+            x=0.5, y=0.5, showarrow=False
+        ), html.Div()
+    drawdowns = view.subset(window_data).get_drawdown_analysis()
+
+    fig = drawdowns.create_underwater_chart(highlight='Portfolio')
+    summary = drawdowns.get_drawdown_summary()
+    episodes = drawdowns.get_episode_index()
+    worst = episodes[episodes['series'] == 'Portfolio'].nsmallest(3, 'depth')
+
+    table = pd.DataFrame({
+        'Series': summary.index,
+        'Max DD': summary['max_drawdown'].map('{:.1f}%'.format),
+        'Under Water': summary['time_under_water'].map('{:.0f}%'.format),
+        'Ulcer': summary['ulcer_index'].map('{:.1f}'.format),
+        'Calmar': summary['calmar_ratio'].map(lambda c: f"{c:.2f}" if pd.notna(c) else "N/A")
+    })
+    episode_items = [
+        html.Li(f"{row.depth:.1f}%: {row.peak_date:%b %Y} → {row.trough_date:%b %Y}, "
+                + (f"recovered {row.recovery_date:%b %Y}" if row.recovered else "not yet recovered")
+                + f" ({row.duration_days} days)", className="mb-1")
+        for row in worst.itertuples()
+    ]
+
+    return fig, dbc.Card([
+        dbc.CardHeader([
+            html.H5("📉 Drawdown Statistics", className="mb-0")
+        ]),
+        dbc.CardBody([
+            dbc.Table.from_dataframe(table, striped=True, bordered=False, hover=True,
+                                     size='sm', className="mb-3"),
+            html.H6("Worst Portfolio Drawdowns", className="text-danger mb-2"),
+            html.Ul(episode_items, className="mb-0 small")
+        ])
+    ], className="h-100")
 
 @app.callback(
-    Output('performance-metrics-chart', 'figure'),
-    [Input('stock-selector', 'value')]
+    [Output('stress-chart', 'figure'),
+     Output('stress-summary', 'children')],
+    [Input('stock-selector', 'value'),
+     Input('stress-factor', 'value'),
+     Input('stress-shock', 'value')]
 )
-def update_performance_metrics(selected_stocks):
+def update_stress_test(selected_stocks, factor, shock):
     if not selected_stocks:
         return go.Figure().add_annotation(
-            text="Please select stocks to view performance metrics",
+            text="Please select stocks to run scenarios",
             xref="paper", yref="paper",
             x=0.5, y=0.5, showarrow=False
-        )
-    filtered_data = {name: data for name, data in analyzer.stock_data.items() 
-                    if name in selected_stocks}
-    original_data = analyzer.stock_data
-    analyzer.stock_data = filtered_data
-    fig = analyzer.create_performance_metrics_chart()
-    analyzer.stock_data = original_data
-    
-    return fig
+        ), html.Div()
+
+    factor_shocks = dict(DEFAULT_FACTOR_SHOCKS)
+    if factor and shock is not None:
+        factor_shocks[f"{factor} {shock:+.0f}% (custom)"] = {factor: shock / 100}
+    view = session_view(selected_stocks)
+    engine, stress = view.run_stress_test(factor_shocks=factor_shocks, names=selected_stocks)
+    summary = stress['summary']
+    worst = stress['results'].head(3)
+
+    return engine.create_scenario_chart(stress), html.Div([
+        html.P(f"Scenarios Evaluated: {summary['scenario_count']:,}", className="mb-1"),
+        html.P(f"Worst Scenario: {summary['worst']:.1f}%", className="mb-1 text-danger"),
+        html.P(f"{stress['horizon']}-Day VaR (95% / 99%): "
+               f"{summary['rolling_var_95']:.1f}% / {summary['rolling_var_99']:.1f}%", className="mb-1"),
+        html.Ul([html.Li(f"{row.scenario}: {row.pnl:.1f}%") for row in worst.itertuples()],
+                className="mb-0")
+    ])
 
 @app.callback(
     Output('portfolio-summary', 'children'),
-    [Input('stock-selector', 'value')]
+    [Input('stock-selector', 'value'),
+     Input('date-range', 'start_date'),
+     Input('date-range', 'end_date')]
 )
-def update_portfolio_summary(selected_stocks):
+def update_portfolio_summary(selected_stocks, start_date, end_date):
     if not selected_stocks or len(selected_stocks) < 2:
         return html.Div()
 
-    filtered_data = {name: data for name, data in analyzer.stock_data.items() 
-                    if name in selected_stocks}
-    original_data = analyzer.stock_data
-    analyzer.stock_data = filtered_data
-    portfolio_summary = analyzer.get_portfolio_summary()
+    view = analyzer.snapshot()
+    window_data = select_stock_data(view, selected_stocks, start_date, end_date)
+    if len(window_data) < 2:
+        return html.Div(SHORT_WINDOW_MESSAGE, className="text-muted")
+    portfolio_summary = view.subset(window_data).get_portfolio_summary()
     pm = portfolio_summary['portfolio_metrics']
-    analyzer.stock_data = original_data
-    
+
     return dbc.Card([
         dbc.CardHeader([
             html.H5("🏦 Portfolio-Level Analysis (Equal-Weighted)", className="mb-0")
@@ -289,85 +678,10 @@ def update_portfolio_summary(selected_stocks):
         ])
     ])
 
-@app.callback(
-    Output('summary-stats', 'children'),
-    [Input('stock-selector', 'value')]
-)
-def update_summary_stats(selected_stocks):
-    if not selected_stocks:
-        return html.Div("Please select stocks to view summary statistics")
-    
-    summary = analyzer.get_stock_summary()
-    cards = []
-    for stock in selected_stocks:
-        if stock in summary:
-            data = summary[stock]
-            return_color = "success" if data['total_return'] > 0 else "danger"
-            sharpe_color = "success" if data['sharpe_ratio'] > 1 else "warning" if data['sharpe_ratio'] > 0.5 else "danger"
-            
-            card = dbc.Col([
-                dbc.Card([
-                    dbc.CardBody([
-                        html.H5(f"{stock} ({data['symbol']})", 
-                               className="card-title text-center"),
-                        html.Hr(),
-                        html.P([
-                            html.Strong("Current Price: "),
-                            f"${data['current_price']:.2f}"
-                        ], className="mb-1"),
-                        html.P([
-                            html.Strong("Total Return: "),
-                            html.Span(f"{data['total_return']:.1f}%",
-                                    className=f"text-{return_color}")
-                        ], className="mb-1"),
-                        html.P([
-                            html.Strong("Annualized Return: "),
-                            f"{data['annualized_return']:.1f}%"
-                        ], className="mb-1"),
-                        html.P([
-                            html.Strong("Volatility: "),
-                            f"{data['volatility']:.1f}%"
-                        ], className="mb-1"),
-                        html.P([
-                            html.Strong("Sharpe Ratio: "),
-                            html.Span(f"{data['sharpe_ratio']:.2f}",
-                                    className=f"text-{sharpe_color}")
-                        ], className="mb-1"),
-                        html.P([
-                            html.Strong("Max Drawdown: "),
-                            f"{data['max_drawdown']:.1f}%"
-                        ], className="mb-1"),
-                        html.P([
-                            html.Strong("VaR (95%): "),
-                            f"{data['var_95']:.1f}%"
-                        ], className="mb-1"),
-                        html.P([
-                            html.Strong("Win Rate: "),
-                            f"{data['win_rate']:.1f}%"
-                        ], className="mb-1"),
-                        html.P([
-                            html.Strong("Beta: "),
-                            f"{data['beta']:.2f}" if data['beta'] else "N/A"
-                        ], className="mb-0")
-                    ])
-                ], className="h-100")
-            ], width=12, md=6, lg=4, xl=12//min(len(selected_stocks), 4), className="mb-3 mb-lg-0")
-            
-            cards.append(card)
-    
-    return dbc.Card([
-        dbc.CardHeader([
-            html.H5("📊 Advanced Risk Metrics & Performance Statistics", className="mb-0")
-        ]),
-        dbc.CardBody([
-            dbc.Row(cards)
-        ])
-    ])
 server = app.server
+register_analytics_api(server, analyzer)
 
 if __name__ == '__main__':
-    import os
-    
     print("\nStarting Stock Market Analysis Dashboard...")
     port = int(os.environ.get('PORT', 8050))
     host = os.environ.get('HOST', '0.0.0.0')
@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.express as px
+
+TRADING_DAYS = 252
+# Annualizing fewer observations than this extrapolates noise, not returns
+MIN_ANNUALIZATION_DAYS = 63
+
+
+class DrawdownAnalyzer:
+    def __init__(self, wealth):
+        if isinstance(wealth, pd.Series):
+            wealth = wealth.to_frame()
+        # Forward-fill so gaps inside a series don't split drawdown episodes
+        self.wealth = wealth.astype(float).ffill()
+        values = self.wealth.to_numpy()
+        running_max = np.fmax.accumulate(values, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            underwater = values / running_max - 1
+        self.underwater = pd.DataFrame(underwater, index=self.wealth.index, columns=self.wealth.columns)
+        self._episodes = None
+
+    def calculate_max_drawdown(self):
+        return self.underwater.min() * 100
+
+    def get_episode_index(self):
+        if self._episodes is not None:
+            return self._episodes
+
+        dd = self.underwater.to_numpy()
+        n_obs, n_series = dd.shape
+        underwater = np.nan_to_num(dd, nan=0.0) < 0
+
+        # Rising edges start an episode, falling edges mark the recovery row
+        # (row == n_obs for episodes still open at the end of the data)
+        padded = np.zeros((n_series, n_obs + 2), dtype=np.int8)
+        padded[:, 1:-1] = underwater.T
+        edges = np.diff(padded, axis=1)
+        start_cols, start_rows = np.nonzero(edges == 1)
+        _, end_rows = np.nonzero(edges == -1)
+
+        if len(start_rows) == 0:
+            dates = self.underwater.index[:0]
+            self._episodes = pd.DataFrame({
+                'series': self.underwater.columns[:0],
+                'peak_date': dates,
+                'trough_date': dates,
+                'recovery_date': dates,
+                'depth': pd.Series(dtype=float),
+                'drawdown_days': pd.Series(dtype=np.int64),
+                'recovery_days': pd.Series(dtype=float),
+                'duration_days': pd.Series(dtype=np.int64),
+                'recovered': pd.Series(dtype=bool)
+            })
+            return self._episodes
+
+        # Column-major flat view with a sentinel so every episode is a contiguous slice
+        flat = np.append(np.nan_to_num(dd.T, nan=0.0).ravel(), 0.0)
+        flat_starts = start_cols * n_obs + start_rows
+        flat_ends = start_cols * n_obs + end_rows
+        bounds = np.empty(2 * len(flat_starts), dtype=np.int64)
+        bounds[0::2] = flat_starts
+        bounds[1::2] = flat_ends
+        depths = np.minimum.reduceat(flat, bounds)[0::2]
+
+        marker = np.zeros(len(flat) + 1, dtype=np.int64)
+        np.add.at(marker, flat_starts, 1)
+        np.add.at(marker, flat_ends, -1)
+        in_episode = np.cumsum(marker)[:-1] > 0
+        start_flags = np.zeros(len(flat), dtype=np.int64)
+        start_flags[flat_starts] = 1
+        episode_ids = np.cumsum(start_flags) - 1
+        positions = np.nonzero(in_episode & (flat == depths[np.clip(episode_ids, 0, None)]))[0]
+        _, first = np.unique(episode_ids[positions], return_index=True)
+        trough_rows = positions[first] - start_cols * n_obs
+
+        dates = self.underwater.index
+        recovered = end_rows < n_obs
+        peak_rows = start_rows - 1
+        last_rows = np.where(recovered, end_rows, n_obs - 1)
+
+        self._episodes = pd.DataFrame({
+            'series': self.underwater.columns[start_cols],
+            'peak_date': dates[peak_rows],
+            'trough_date': dates[trough_rows],
+            'recovery_date': dates[np.minimum(end_rows, n_obs - 1)].where(recovered),
+            'depth': depths * 100,
+            'drawdown_days': trough_rows - peak_rows,
+            'recovery_days': np.where(recovered, end_rows - trough_rows, np.nan),
+            'duration_days': last_rows - peak_rows,
+            'recovered': recovered
+        })
+        return self._episodes
+
+    def get_drawdown_summary(self):
+        dd = self.underwater.to_numpy()
+        values = self.wealth.to_numpy()
+        valid = ~np.isnan(dd)
+        observations = valid.sum(axis=0)
+        dd_filled = np.where(valid, dd, 0.0)
+
+        max_drawdown = dd_filled.min(axis=0) * 100
+        time_under_water = (dd_filled < 0).sum(axis=0) / np.maximum(observations, 1) * 100
+        ulcer_index = np.sqrt(((dd_filled * 100) ** 2).sum(axis=0) / np.maximum(observations, 1))
+
+        first_rows = np.argmax(valid, axis=0)
+        first_values = values[first_rows, np.arange(values.shape[1])]
+        last_values = values[-1]
+        years = np.maximum(observations - 1, 1) / TRADING_DAYS
+        annualized_return = np.where(observations >= MIN_ANNUALIZATION_DAYS,
+                                     ((last_values / first_values) ** (1 / years) - 1) * 100, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            calmar_ratio = np.where(max_drawdown < 0, annualized_return / np.abs(max_drawdown), np.nan)
+
+        episodes = self.get_episode_index()
+        grouped = episodes.groupby('series')
+        summary = pd.DataFrame({
+            'max_drawdown': max_drawdown,
+            'avg_drawdown': grouped['depth'].mean().reindex(self.underwater.columns).to_numpy(dtype=float),
+            'time_under_water': time_under_water,
+            'longest_drawdown_days': grouped['duration_days'].max().reindex(self.underwater.columns)
+                                                             .fillna(0).to_numpy(dtype=float),
+            'episode_count': grouped.size().reindex(self.underwater.columns).fillna(0).to_numpy(dtype=int),
+            'ulcer_index': ulcer_index,
+            'annualized_return': annualized_return,
+            'calmar_ratio': calmar_ratio
+        }, index=self.underwater.columns)
+        return summary
+
+    def create_underwater_chart(self, highlight=None):
+        fig = go.Figure()
+        colors = px.colors.qualitative.Set3
+
+        for i, name in enumerate(self.underwater.columns):
+            is_highlight = name == highlight
+            fig.add_trace(go.Scatter(
+                x=self.underwater.index,
+                y=self.underwater[name] * 100,
+                mode='lines',
+                name=name,
+                fill='tozeroy' if is_highlight else None,
+                line=dict(color='#2c3e50' if is_highlight else colors[i % len(colors)],
+                          width=3 if is_highlight else 1.5),
+                hovertemplate=f'<b>{name}</b><br>' +
+                             'Date: %{x}<br>' +
+                             'Drawdown: %{y:.1f}%<br>' +
+                             '<extra></extra>'
+            ))
+
+        fig.update_layout(
+            title=dict(
+                text="Underwater Curves (Drawdown from Peak)",
+                x=0.5,
+                font=dict(size=14)
+            ),
+            xaxis_title="Date",
+            yaxis_title="Drawdown (%)",
+            hovermode='x unified',
+            template='plotly_white',
+            height=420,
+            showlegend=True,
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=1.02,
+                xanchor="right",
+                x=1,
+                font=dict(size=10)
+            ),
+            margin=dict(l=50, r=50, t=60, b=50)
+        )
+        return fig
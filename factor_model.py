@@ -0,0 +1,128 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+
+TRADING_DAYS = 252
+
+# A factor is either a single ticker (its daily return) or a (long, short)
+# pair whose return spread proxies a style premium.
+DEFAULT_FACTORS = {
+    'Market': 'SPY',
+    'Size': ('IWM', 'SPY'),
+    'Value': ('IWD', 'IWF')
+}
+
+SECTOR_FACTORS = {
+    'Technology': 'XLK',
+    'Communication': 'XLC',
+    'Consumer Discretionary': 'XLY',
+    'Financials': 'XLF',
+    'Health Care': 'XLV'
+}
+
+
+class FactorModel:
+    def __init__(self, factors=None, min_observations=20):
+        self.factors = dict(factors) if factors is not None else dict(DEFAULT_FACTORS)
+        self.min_observations = min_observations
+        self._price_cache = {}
+
+    def clear_cache(self):
+        # Replaced rather than emptied so a fit already in progress keeps its data
+        self._price_cache = {}
+
+    def _fetch_returns(self, symbol, period):
+        key = (symbol, period)
+        cache = self._price_cache
+        if key not in cache:
+            data = yf.Ticker(symbol).history(period=period)
+            cache[key] = data['Close'].pct_change().dropna() if not data.empty else None
+        return cache[key]
+
+    def fetch_factor_returns(self, period='2y'):
+        factor_returns = {}
+        for name, spec in self.factors.items():
+            try:
+                if isinstance(spec, (tuple, list)):
+                    long_leg = self._fetch_returns(spec[0], period)
+                    short_leg = self._fetch_returns(spec[1], period)
+                    if long_leg is not None and short_leg is not None:
+                        factor_returns[name] = long_leg - short_leg
+                else:
+                    returns = self._fetch_returns(spec, period)
+                    if returns is not None:
+                        factor_returns[name] = returns
+            except Exception as e:
+                print(f"Error fetching factor {name}: {e}")
+        return pd.DataFrame(factor_returns).dropna()
+
+    def _design(self, returns_df, factor_returns):
+        factor_returns = factor_returns.dropna()
+        returns_df = returns_df.reindex(factor_returns.index)
+        X = np.column_stack([np.ones(len(factor_returns)), factor_returns.to_numpy(dtype=float)])
+        Y = returns_df.to_numpy(dtype=float)
+        mask = ~np.isnan(Y)
+        return X, np.where(mask, Y, 0.0), mask.astype(float), returns_df.index
+
+    def fit(self, returns_df, factor_returns):
+        X, Y, M, _ = self._design(returns_df, factor_returns)
+        names = ['alpha'] + list(factor_returns.columns)
+        k = X.shape[1]
+
+        # Per-ticker normal equations from one masked contraction, so tickers
+        # with different histories are still solved in a single batch
+        XtX = np.einsum('tk,tl,tn->nkl', X, X, M)
+        XtY = np.einsum('tk,tn->nk', X, Y)
+        XtX_inv = np.linalg.pinv(XtX)
+        coefs = np.einsum('nkl,nl->nk', XtX_inv, XtY)
+
+        residuals = (Y - X @ coefs.T) * M
+        observations = M.sum(axis=0)
+        dof = np.maximum(observations - k, 1)
+        sse = (residuals ** 2).sum(axis=0)
+        sigma2 = sse / dof
+        std_errors = np.sqrt(sigma2[:, None] * np.diagonal(XtX_inv, axis1=1, axis2=2))
+
+        y_mean = Y.sum(axis=0) / np.maximum(observations, 1)
+        sst = (((Y - y_mean) * M) ** 2).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_stats = coefs / std_errors
+            r_squared = np.where(sst > 0, 1 - sse / sst, np.nan)
+
+        results = pd.DataFrame(index=returns_df.columns)
+        results['alpha'] = coefs[:, 0] * TRADING_DAYS * 100
+        for i, name in enumerate(names[1:], start=1):
+            results[f'beta_{name}'] = coefs[:, i]
+        results['r_squared'] = r_squared
+        results['residual_volatility'] = np.sqrt(sigma2 * TRADING_DAYS) * 100
+        for i, name in enumerate(names):
+            results[f't_{name}'] = t_stats[:, i]
+        results['observations'] = observations.astype(int)
+        results.loc[observations < self.min_observations, results.columns != 'observations'] = np.nan
+        return results
+
+    def rolling_betas(self, returns_df, factor_returns, window=60):
+        X, Y, M, index = self._design(returns_df, factor_returns)
+        n_obs = X.shape[0]
+        if n_obs < window:
+            return {}
+
+        # Running sums of the per-day normal-equation terms; each window's
+        # system is the difference of two prefix sums instead of a refit
+        zeros_xx = np.zeros((1, Y.shape[1], X.shape[1], X.shape[1]))
+        zeros_xy = np.zeros((1, Y.shape[1], X.shape[1]))
+        prefix_xx = np.concatenate([zeros_xx, np.cumsum(np.einsum('tk,tl,tn->tnkl', X, X, M), axis=0)])
+        prefix_xy = np.concatenate([zeros_xy, np.cumsum(np.einsum('tk,tn->tnk', X, Y), axis=0)])
+        prefix_n = np.concatenate([np.zeros((1, Y.shape[1])), np.cumsum(M, axis=0)])
+
+        window_xx = prefix_xx[window:] - prefix_xx[:-window]
+        window_xy = prefix_xy[window:] - prefix_xy[:-window]
+        window_n = prefix_n[window:] - prefix_n[:-window]
+        coefs = np.einsum('wnkl,wnl->wnk', np.linalg.pinv(window_xx), window_xy)
+        coefs[window_n < min(self.min_observations, window)] = np.nan
+
+        dates = index[window - 1:]
+        return {
+            name: pd.DataFrame(coefs[:, :, i], index=dates, columns=returns_df.columns)
+            for i, name in enumerate(factor_returns.columns, start=1)
+        }
@@ -7,7 +7,9 @@ backlog = 2048
 
 # Worker processes
 workers = 1  # Single worker for free tier memory limits
-worker_class = "sync"
+# Threaded worker: a slow callback or ticker download never blocks other sessions
+worker_class = "gthread"
+threads = 4
 worker_connections = 1000
 timeout = 120
 keepalive = 2
@@ -35,4 +37,11 @@ tmp_upload_dir = None
 
 # SSL (not needed for Render)
 keyfile = None
-certfile = None
\ No newline at end of file
+certfile = None
+
+# Server hooks
+def post_fork(server, worker):
+    # Workers recycled by max_requests fork from the preloaded app; reload
+    # tickers that were added from the dashboard since it started
+    from dashboard import ticker_loader
+    ticker_loader.restore()
\ No newline at end of file
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+# Pairwise prefix arrays grow as T x N^2; above this many series window
+# correlations and betas are computed from the raw rows instead
+MAX_PAIRWISE_SERIES = 40
+
+
+def to_session_dates(series):
+    # Rows keyed by local session date, so tickers listed in different time
+    # zones land on the same row for the same trading day
+    index = pd.DatetimeIndex(series.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return series.set_axis(index.normalize())
+
+
+def _prefix_sum(x, dtype=np.float64):
+    # Leading zero row: the sum over rows [a, b) is P[b] - P[a]. Accumulated
+    # in float64 and only then stored in the (possibly narrower) dtype
+    out = np.zeros((x.shape[0] + 1,) + x.shape[1:], dtype=dtype)
+    out[1:] = np.cumsum(x, axis=0)
+    return out
+
+
+def _grow_pairwise(pairs, column, row):
+    # Append one series to a (T+1, N, N) pairwise prefix array: column[:, i]
+    # holds the (i, new) terms and row[:, i] the (new, i) terms
+    n = pairs.shape[1]
+    grown = np.empty((pairs.shape[0], n + 1, n + 1), dtype=pairs.dtype)
+    grown[:, :n, :n] = pairs
+    grown[:, :, n] = column
+    grown[:, n, :] = row
+    return grown
+
+
+class ReturnRangeIndex:
+    def __init__(self, returns_df, max_pairwise_series=MAX_PAIRWISE_SERIES):
+        self.index = pd.DatetimeIndex(returns_df.index)
+        self.columns = list(returns_df.columns)
+        self.max_pairwise_series = max_pairwise_series
+        values = returns_df.to_numpy(dtype=np.float64)
+        mask = ~np.isnan(values)
+        self._r = np.where(mask, values, 0.0)
+        self._m = mask.astype(np.float64)
+        r, m = self._r, self._m
+
+        self._count = _prefix_sum(m, np.int32)
+        self._sum = _prefix_sum(r)
+        self._sum_sq = _prefix_sum(r ** 2)
+        self._sum_log = _prefix_sum(np.log1p(r))
+        # Pairwise terms restricted to rows where both series have data, so
+        # window correlations match pandas' pairwise-complete DataFrame.corr
+        if len(self.columns) <= max_pairwise_series:
+            self._pair_count = _prefix_sum(np.einsum('ti,tj->tij', m, m), np.int32)
+            self._pair_sum = _prefix_sum(np.einsum('ti,tj->tij', r, m), np.float32)
+            self._pair_sum_sq = _prefix_sum(np.einsum('ti,tj->tij', r ** 2, m), np.float32)
+            self._cross = _prefix_sum(np.einsum('ti,tj->tij', r, r), np.float32)
+        else:
+            self._drop_pairwise()
+
+    @property
+    def pairwise(self):
+        return self._pair_count is not None
+
+    def _drop_pairwise(self):
+        self._pair_count = self._pair_sum = self._pair_sum_sq = self._cross = None
+
+    @property
+    def nbytes(self):
+        arrays = (self._r, self._m, self._count, self._sum, self._sum_sq, self._sum_log,
+                  self._pair_count, self._pair_sum, self._pair_sum_sq, self._cross)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def covers(self, dates):
+        return bool(pd.DatetimeIndex(dates).isin(self.index).all())
+
+    def add_series(self, name, returns):
+        values = returns.reindex(self.index).to_numpy(dtype=np.float64)
+        mask = ~np.isnan(values)
+        r_new = np.where(mask, values, 0.0)
+        m_new = mask.astype(np.float64)
+        r = np.column_stack([self._r, r_new])
+        m = np.column_stack([self._m, m_new])
+
+        self._count = np.column_stack([self._count, _prefix_sum(m_new, np.int32)])
+        self._sum = np.column_stack([self._sum, _prefix_sum(r_new)])
+        self._sum_sq = np.column_stack([self._sum_sq, _prefix_sum(r_new ** 2)])
+        self._sum_log = np.column_stack([self._sum_log, _prefix_sum(np.log1p(r_new))])
+        if self.pairwise and r.shape[1] > self.max_pairwise_series:
+            self._drop_pairwise()
+        elif self.pairwise:
+            # Only the new row/column of each pairwise array is computed: O(T * N)
+            pair_count = _prefix_sum(m * m_new[:, None], np.int32)
+            self._pair_count = _grow_pairwise(self._pair_count, pair_count, pair_count)
+            self._pair_sum = _grow_pairwise(self._pair_sum, _prefix_sum(r * m_new[:, None], np.float32),
+                                            _prefix_sum(m * r_new[:, None], np.float32))
+            self._pair_sum_sq = _grow_pairwise(self._pair_sum_sq,
+                                               _prefix_sum(r ** 2 * m_new[:, None], np.float32),
+                                               _prefix_sum(m * (r_new ** 2)[:, None], np.float32))
+            cross = _prefix_sum(r * r_new[:, None], np.float32)
+            self._cross = _grow_pairwise(self._cross, cross, cross)
+        self._r, self._m = r, m
+        self.columns.append(name)
+
+    def _bounds(self, start=None, end=None):
+        a = 0 if start is None else self.index.searchsorted(self._timestamp(start), side='left')
+        b = len(self.index) if end is None else self.index.searchsorted(
+            self._timestamp(end) + pd.Timedelta(days=1), side='left')
+        return a, max(a, b)
+
+    def _timestamp(self, value):
+        ts = pd.Timestamp(value)
+        if self.index.tz is not None and ts.tz is None:
+            ts = ts.tz_localize(self.index.tz)
+        return ts.normalize()
+
+    def _positions(self, names):
+        if names is None:
+            return list(range(len(self.columns))), list(self.columns)
+        names = [name for name in names if name in self.columns]
+        return [self.columns.index(name) for name in names], names
+
+    def window_bounds(self, start=None, end=None):
+        return self._bounds(start, end)
+
+    def get_total_returns(self, starts, ends, names=None):
+        # Compounded return over many row windows [start, end) at once: (S x N)
+        pos, names = self._positions(names)
+        starts = np.asarray(starts)
+        ends = np.asarray(ends)
+        total_log = self._sum_log[ends][:, pos] - self._sum_log[starts][:, pos]
+        counts = self._count[ends][:, pos] - self._count[starts][:, pos]
+        return np.where(counts > 0, np.expm1(total_log), np.nan)
+
+    def window_length(self, start=None, end=None):
+        a, b = self._bounds(start, end)
+        return b - a
+
+    def get_window_stats(self, start=None, end=None, names=None, risk_free_rate=0.0):
+        a, b = self._bounds(start, end)
+        pos, names = self._positions(names)
+        n = self._count[b, pos] - self._count[a, pos]
+        total = self._sum[b, pos] - self._sum[a, pos]
+        total_sq = self._sum_sq[b, pos] - self._sum_sq[a, pos]
+        total_log = self._sum_log[b, pos] - self._sum_log[a, pos]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / n
+            variance = np.where(n > 1, np.maximum(total_sq - total ** 2 / n, 0) / (n - 1), np.nan)
+            std = np.sqrt(variance)
+            sharpe = np.where(std != 0, (mean * 252 - risk_free_rate) / (std * np.sqrt(252)), 0)
+            # Fewer than two returns have no volatility, so no Sharpe either
+            sharpe = np.where(n > 1, sharpe, np.nan)
+
+        return pd.DataFrame({
+            'mean_return': mean * 100,
+            'annualized_return': ((1 + mean) ** 250 - 1) * 100,
+            'total_return': np.where(n > 0, np.expm1(total_log) * 100, np.nan),
+            'volatility': std * np.sqrt(250) * 100,
+            'sharpe_ratio': sharpe,
+            'trading_days': n.astype(int)
+        }, index=names)
+
+    def _pair_moments(self, a, b, pos):
+        if self.pairwise:
+            ix = np.ix_(pos, pos)
+            n, sx, sxx, sxy = [(prefix[b][ix] - prefix[a][ix]).astype(np.float64) for prefix in
+                               (self._pair_count, self._pair_sum, self._pair_sum_sq, self._cross)]
+        else:
+            # O(W * N^2) over the window's rows, with no stored N^2 arrays
+            r, m = self._r[a:b][:, pos], self._m[a:b][:, pos]
+            n, sx, sxx, sxy = m.T @ m, r.T @ m, (r ** 2).T @ m, r.T @ r
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (sxy - sx * sx.T / n) / (n - 1)
+            var_x = (sxx - sx ** 2 / n) / (n - 1)
+        return cov, var_x
+
+    def get_window_correlation(self, start=None, end=None, names=None):
+        a, b = self._bounds(start, end)
+        pos, names = self._positions(names)
+        cov, var_x = self._pair_moments(a, b, pos)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.sqrt(var_x * var_x.T)
+        np.fill_diagonal(corr, 1.0)
+        return pd.DataFrame(np.clip(corr, -1, 1), index=names, columns=names)
+
+    def get_window_beta(self, market, start=None, end=None, names=None):
+        a, b = self._bounds(start, end)
+        pos, names = self._positions(names)
+        market_pos = self.columns.index(market)
+        cov, var_x = self._pair_moments(a, b, pos + [market_pos])
+        # var_x[market, i] is the market variance over the rows shared with ticker i
+        with np.errstate(divide='ignore', invalid='ignore'):
+            beta = cov[:-1, -1] / var_x[-1, :-1]
+        return pd.Series(beta, index=names)
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+HISTORICAL_SCENARIOS = {
+    '2018 Q4 Selloff': ('2018-09-20', '2018-12-24'),
+    'COVID Crash (Mar 2020)': ('2020-02-19', '2020-03-23'),
+    '2022 Rate Shock': ('2022-01-03', '2022-10-12'),
+    'Regional Bank Stress (Mar 2023)': ('2023-03-08', '2023-03-17'),
+    'Carry Trade Unwind (Aug 2024)': ('2024-07-16', '2024-08-05')
+}
+
+DEFAULT_FACTOR_SHOCKS = {
+    'Market -10%': {'Market': -0.10},
+    'Tech -20%': {'Technology': -0.20},
+    'Financials -15%': {'Financials': -0.15}
+}
+
+
+class ScenarioEngine:
+    def __init__(self, range_index, names, factor_returns=None, factor_betas=None):
+        self.range_index = range_index
+        self.names = [name for name in names if name in range_index.columns]
+        self.factor_returns = factor_returns
+        self.factor_betas = factor_betas
+
+    def historical_scenarios(self, scenarios=None):
+        scenarios = HISTORICAL_SCENARIOS if scenarios is None else scenarios
+        first_day = self.range_index.index[0].strftime('%Y-%m-%d')
+        rows, bounds = [], []
+        for name, (start, end) in scenarios.items():
+            # Skip replays that start before the stored history
+            if start < first_day:
+                continue
+            a, b = self.range_index.window_bounds(start, end)
+            if b > a:
+                rows.append({'scenario': name, 'type': 'Historical', 'start': start, 'end': end})
+                bounds.append((a, b))
+        if not bounds:
+            return pd.DataFrame(rows), np.empty((0, len(self.names)))
+        starts, ends = np.array(bounds).T
+        return pd.DataFrame(rows), self.range_index.get_total_returns(starts, ends, self.names)
+
+    def rolling_scenarios(self, horizon=21, step=1):
+        n_obs = len(self.range_index.index)
+        if n_obs < horizon:
+            return pd.DataFrame(), np.empty((0, len(self.names)))
+        starts = np.arange(0, n_obs - horizon + 1, step)
+        ends = starts + horizon
+        dates = self.range_index.index
+        info = pd.DataFrame({
+            'scenario': [f"{horizon}-day window from {dates[a]:%Y-%m-%d}" for a in starts],
+            'type': 'Rolling',
+            'start': dates[starts].strftime('%Y-%m-%d'),
+            'end': dates[ends - 1].strftime('%Y-%m-%d')
+        })
+        return info, self.range_index.get_total_returns(starts, ends, self.names)
+
+    def factor_scenarios(self, factor_shocks):
+        if not factor_shocks or self.factor_returns is None or self.factor_betas is None:
+            return pd.DataFrame(), np.empty((0, len(self.names)))
+        factors = list(self.factor_returns.columns)
+        covariance = self.factor_returns.cov().to_numpy()
+        betas = self.factor_betas.reindex(self.names)[[f'beta_{f}' for f in factors]].fillna(0).to_numpy()
+
+        rows, moves = [], []
+        for name, shocks in factor_shocks.items():
+            shocked = [factors.index(f) for f in shocks if f in factors]
+            if not shocked:
+                continue
+            values = np.array([shocks[factors[i]] for i in shocked])
+            # Unshocked factors move by their conditional expectation given the shocked ones
+            sigma_ss = covariance[np.ix_(shocked, shocked)]
+            moves.append(covariance[:, shocked] @ np.linalg.pinv(sigma_ss) @ values)
+            rows.append({'scenario': name, 'type': 'Factor Shock', 'start': None, 'end': None})
+        if not moves:
+            return pd.DataFrame(rows), np.empty((0, len(self.names)))
+        return pd.DataFrame(rows), np.array(moves) @ betas.T
+
+    def run(self, weights, factor_shocks=None, horizon=21, historical=None):
+        weights = np.asarray(weights, dtype=float)
+        parts = [
+            self.historical_scenarios(historical),
+            self.factor_scenarios(factor_shocks),
+            self.rolling_scenarios(horizon)
+        ]
+        frames = [p[0] for p in parts if len(p[0])]
+        # History shorter than the horizon with no named windows or shocks
+        # leaves nothing to price
+        info = pd.concat(frames, ignore_index=True) if frames else \
+            pd.DataFrame(columns=['scenario', 'type', 'start', 'end'])
+        scenario_returns = np.vstack([p[1] for p in parts])
+
+        # Every scenario priced against the portfolio in a single matrix product;
+        # assets without data in a window contribute zero and reduce coverage
+        available = ~np.isnan(scenario_returns)
+        info['pnl'] = np.nan_to_num(scenario_returns) @ weights * 100
+        info['coverage'] = available @ np.abs(weights) / np.abs(weights).sum() * 100
+
+        pnl = info['pnl'].to_numpy()
+        rolling = pnl[info['type'].to_numpy() == 'Rolling']
+        summary = {
+            'scenario_count': len(info),
+            'worst': pnl.min() if len(pnl) else np.nan,
+            'best': pnl.max() if len(pnl) else np.nan,
+            'rolling_var_95': np.percentile(rolling, 5) if len(rolling) else np.nan,
+            'rolling_var_99': np.percentile(rolling, 1) if len(rolling) else np.nan,
+            'rolling_median': np.median(rolling) if len(rolling) else np.nan
+        }
+        return {
+            'results': info.sort_values('pnl').reset_index(drop=True),
+            'summary': summary,
+            'horizon': horizon
+        }
+
+    def create_scenario_chart(self, stress_results):
+        results = stress_results['results']
+        named = results[results['type'] != 'Rolling'].sort_values('pnl', ascending=False)
+        rolling = results[results['type'] == 'Rolling']
+
+        fig = make_subplots(
+            rows=1, cols=2,
+            column_widths=[0.55, 0.45],
+            subplot_titles=('Named Scenarios',
+                            f"{stress_results['horizon']}-Day Historical P&L Distribution")
+        )
+        fig.add_trace(
+            go.Bar(
+                x=named['pnl'],
+                y=named['scenario'],
+                orientation='h',
+                marker_color=['lightcoral' if v < 0 else 'lightgreen' for v in named['pnl']],
+                hovertemplate='<b>%{y}</b><br>P&L: %{x:.1f}%<extra></extra>'
+            ),
+            row=1, col=1
+        )
+        fig.add_trace(
+            go.Histogram(
+                x=rolling['pnl'],
+                nbinsx=50,
+                marker_color='lightblue',
+                hovertemplate='P&L: %{x:.1f}%<br>Windows: %{y}<extra></extra>'
+            ),
+            row=1, col=2
+        )
+        var_95 = stress_results['summary']['rolling_var_95']
+        if not np.isnan(var_95):
+            fig.add_vline(x=var_95, line_dash='dash', line_color='red', row=1, col=2,
+                          annotation_text="5th pct", annotation_font_size=9)
+
+        fig.update_layout(
+            title=dict(
+                text="Portfolio Scenario & Stress Testing",
+                x=0.5,
+                font=dict(size=14)
+            ),
+            showlegend=False,
+            template='plotly_white',
+            height=420,
+            margin=dict(l=50, r=50, t=60, b=50)
+        )
+        fig.update_xaxes(title_text="P&L (%)")
+        return fig
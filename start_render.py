@@ -2,7 +2,7 @@ import os
 import sys
 import time
 import signal
-from dashboard import app, analyzer
+from dashboard import app, analyzer, HISTORY_PERIOD
 def signal_handler(signum, frame):
     print(f"\nReceived signal {signum}, shutting down gracefully...")
     sys.exit(0)
@@ -11,7 +11,7 @@ def preload_data():
     print("Preloading stock data for faster response times...")
     try:
         start_time = time.time()
-        success = analyzer.fetch_stock_data(period='2y')
+        success = analyzer.fetch_stock_data(period=HISTORY_PERIOD)
         load_time = time.time() - start_time
         if success:
             print(f"Data loaded successfully in {load_time:.1f} seconds")
@@ -1,3 +1,5 @@
+import copy
+import threading
 import yfinance as yf
 import pandas as pd
 import numpy as np
@@ -6,11 +8,17 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.express as px
 from scipy.stats import pearsonr
+from drawdown_analyzer import DrawdownAnalyzer
+from factor_model import FactorModel, SECTOR_FACTORS
+from backtester import Backtester
+from ticker_store import TickerStore, LazyStockData, DEFAULT_CACHE_DIR
+from range_index import ReturnRangeIndex, to_session_dates
+from scenario_engine import ScenarioEngine
 import warnings
 warnings.filterwarnings('ignore')
 
 class StockAnalyzer:
-    def __init__(self):
+    def __init__(self, memory_budget_mb=None, cache_dir=DEFAULT_CACHE_DIR, max_cache_age_hours=24):
         self.major_stocks = {
             'Apple': 'AAPL',
             'Microsoft': 'MSFT',
@@ -23,34 +31,220 @@ class StockAnalyzer:
             'JPMorgan': 'JPM',
             'Johnson & Johnson': 'JNJ'
         }
-        self.stock_data = {}
+        self.max_cache_age_hours = max_cache_age_hours
+        self.ticker_store = TickerStore(cache_dir)
+        if memory_budget_mb:
+            self.stock_data = LazyStockData(self.major_stocks, self.ticker_store, memory_budget_mb)
+        else:
+            self.stock_data = {}
+        self._lock = threading.RLock()
+        # Derived results keyed by (data_version, names); shared with snapshots
+        self._cache = {}
+        self.data_version = 0
+        self.data_timestamp = None
+        self.data_period = '2y'
+        self.market_model = FactorModel({'Market': 'SPY'})
+        self.stress_model = FactorModel(dict({'Market': 'SPY'}, **SECTOR_FACTORS))
     def fetch_stock_data(self, period='2y'):
         print("Fetching stock data...")
+        self.data_period = period
+        # Factor prices are refreshed along with the stocks they're fitted against
+        self.market_model.clear_cache()
+        self.stress_model.clear_cache()
+        lazy = isinstance(self.stock_data, LazyStockData)
+        # Tickers added from the dashboard in earlier runs
+        try:
+            added = self.ticker_store.load_added_tickers()
+        except Exception as e:
+            print(f"Could not read added tickers: {e}")
+            added = {}
+        self.major_stocks = dict(self.major_stocks, **{name: symbol for name, symbol in added.items()
+                                                       if name not in self.major_stocks})
+        if lazy:
+            self.stock_data.symbols = self.major_stocks
         for name, symbol in self.major_stocks.items():
             try:
+                if lazy and self.ticker_store.is_fresh(symbol, period, self.max_cache_age_hours):
+                    self.stock_data.register(name)
+                    print(f"{name} ({symbol}) [cached]")
+                    continue
                 ticker = yf.Ticker(symbol)
                 data = ticker.history(period=period)
                 if not data.empty:
-                    self.stock_data[name] = data
+                    if lazy:
+                        self.stock_data.save(name, data, period=period)
+                    else:
+                        self.stock_data[name] = data
                     print(f"{name} ({symbol})")
                 else:
                     print(f"No data for {name} ({symbol})")
             except Exception as e:
                 print(f"Error fetching {name}: {e}")
+                if lazy and self.stock_data.register(name):
+                    print(f"Using stored data for {name}")
+        self.data_version += 1
+        self.data_timestamp = datetime.now()
         
         return len(self.stock_data) > 0
     
+    def subset(self, stock_data):
+        view = copy.copy(self)
+        view.stock_data = stock_data
+        # Derived results depend on the tickers; the pinned risk-free rate doesn't
+        view._cache = {key: value for key, value in self._cache.items() if key == 'risk_free_rate'}
+        return view
+    
+    def snapshot(self, names=None):
+        # A consistent view of the current tickers that a concurrent add_stock
+        # can't change mid-request, optionally narrowed to some of them
+        with self._lock:
+            view = copy.copy(self)
+            if isinstance(self.stock_data, LazyStockData):
+                view.stock_data = self.stock_data.snapshot(names)
+            else:
+                view.stock_data = {name: self.stock_data[name]
+                                   for name in (self.stock_data if names is None else names)
+                                   if name in self.stock_data}
+            return view
+    
+    def load_ticker_data(self, symbol):
+        if self.ticker_store.is_fresh(symbol, self.data_period, self.max_cache_age_hours):
+            return self.ticker_store.load(symbol), True
+        data = yf.Ticker(symbol).history(period=self.data_period)
+        if data.empty:
+            return None, False
+        self.ticker_store.save(symbol, LazyStockData.compact(data), period=self.data_period)
+        return data, False
+    
+    def add_stock(self, name, symbol, data):
+        with self._lock:
+            if name in self.stock_data:
+                return False
+            old_version = (self.data_version, tuple(self.stock_data.keys()))
+            # Copy-on-write so callbacks iterating the old mappings are unaffected
+            self.major_stocks = dict(self.major_stocks, **{name: symbol})
+            if isinstance(self.stock_data, LazyStockData):
+                self.stock_data.symbols = self.major_stocks
+                self.stock_data.save(name, data, period=self.data_period)
+            else:
+                self.stock_data = dict(self.stock_data, **{name: data})
+
+            self.data_version += 1
+            self.data_timestamp = datetime.now()
+            # Extend the prefix-sum index by one column instead of rebuilding it,
+            # unless the new ticker trades on sessions the index doesn't have
+            returns = to_session_dates(data['Close'].pct_change().dropna())
+            cached = self._cache.get('range_index')
+            if cached is not None and cached[0] == old_version and cached[1].covers(returns.index):
+                index = copy.copy(cached[1])
+                index.columns = list(index.columns)
+                index.add_series(name, returns)
+                self._cache['range_index'] = ((self.data_version, tuple(self.stock_data.keys())), index)
+            else:
+                self._cache.pop('range_index', None)
+
+            try:
+                self.ticker_store.save_added_tickers(
+                    dict(self.ticker_store.load_added_tickers(), **{name: symbol}))
+            except Exception as e:
+                print(f"Could not save added tickers: {e}")
+            return True
+    
+    def get_history_bounds(self):
+        if not self.stock_data:
+            return None, None
+        if isinstance(self.stock_data, LazyStockData):
+            bounds = list(self.stock_data.get_bounds().values())
+        else:
+            bounds = [(data.index[0], data.index[-1]) for data in self.stock_data.values()]
+        return min(first for first, _ in bounds).date(), max(last for _, last in bounds).date()
+    
+    def get_memory_usage(self):
+        cached = self._cache.get('range_index')
+        index_bytes = cached[1].nbytes if cached is not None else 0
+        # used_mb is ticker data, which is what the budget bounds; the range
+        # index sits outside it and is reported on its own
+        if isinstance(self.stock_data, LazyStockData):
+            usage = self.stock_data.get_memory_usage()
+        else:
+            used = sum(data.memory_usage(index=True).sum() for data in self.stock_data.values())
+            usage = {
+                'used_mb': float(used) / (1024 * 1024),
+                'budget_mb': None,
+                'resident_tickers': len(self.stock_data),
+                'total_tickers': len(self.stock_data)
+            }
+        usage['range_index_mb'] = index_bytes / (1024 * 1024)
+        return usage
+    
     def calculate_returns(self):
         returns_data = {}
         for name, data in self.stock_data.items():
             returns_data[name] = data['Close'].pct_change().dropna()
         return pd.DataFrame(returns_data)
     
+    def build_range_index(self):
+        view = self.snapshot()
+        version = (view.data_version, tuple(view.stock_data.keys()))
+        cached = self._cache.get('range_index')
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        # Built outside the lock, which only guards the swap, so a rebuild
+        # doesn't stall every other session
+        returns_df = pd.DataFrame({name: to_session_dates(data['Close'].pct_change().dropna())
+                                   for name, data in view.stock_data.items()})
+        try:
+            market_returns = self.market_model.fetch_factor_returns(period=self.data_period)
+            market = to_session_dates(market_returns['Market'])
+            returns_df['Market'] = market.reindex(returns_df.index)
+        except Exception as e:
+            print(f"Could not fetch market returns: {e}")
+        index = ReturnRangeIndex(returns_df)
+
+        with self._lock:
+            cached = self._cache.get('range_index')
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            # A stale view must not replace an index built for newer data
+            if cached is None or cached[0][0] <= version[0]:
+                self._cache['range_index'] = (version, index)
+        return index
+    
+    def get_window_statistics(self, start_date=None, end_date=None, names=None):
+        index = self.build_range_index()
+        names = [name for name in (names or self.stock_data.keys()) if name in index.columns]
+        stats = index.get_window_stats(start_date, end_date, names,
+                                       risk_free_rate=self.get_current_risk_free_rate())
+        if 'Market' in index.columns:
+            stats['beta'] = index.get_window_beta('Market', start_date, end_date, names)
+        else:
+            stats['beta'] = np.nan
+        return stats
+    
+    def calculate_window_correlation(self, start_date=None, end_date=None, names=None):
+        index = self.build_range_index()
+        names = [name for name in (names or self.stock_data.keys()) if name in index.columns]
+        return index.get_window_correlation(start_date, end_date, names)
+    
     def calculate_correlation_matrix(self):
         returns_df = self.calculate_returns()
         return returns_df.corr()
     
     def get_current_risk_free_rate(self):
+        # Pinned per data version so results cached against that version (and
+        # their ETags) don't silently mix in a newer Treasury quote
+        cached = self._cache.get('risk_free_rate')
+        if cached is not None and cached[0] == self.data_version:
+            return cached[1]
+        rate = self._fetch_risk_free_rate()
+        with self._lock:
+            cached = self._cache.get('risk_free_rate')
+            if cached is None or cached[0] <= self.data_version:
+                self._cache['risk_free_rate'] = (self.data_version, rate)
+        return rate
+    
+    def _fetch_risk_free_rate(self):
         try:
             treasury = yf.Ticker("^TNX")
             data = treasury.history(period="5d")
@@ -71,27 +265,25 @@ class StockAnalyzer:
         return excess_returns / volatility if volatility != 0 else 0
     
     def calculate_max_drawdown(self, prices):
-        cumulative = (1 + prices.pct_change()).cumprod()
-        running_max = cumulative.expanding().max()
-        drawdown = (cumulative - running_max) / running_max
-        return drawdown.min() * 100
+        return DrawdownAnalyzer(prices).calculate_max_drawdown().iloc[0]
+    
+    def calculate_wealth_curve(self, returns):
+        start_date = min(data.index[0] for data in self.stock_data.values())
+        wealth = (1 + returns).cumprod()
+        return pd.concat([pd.Series([1.0], index=[start_date]), wealth])
     
     def calculate_var(self, returns, confidence=0.05):
         return np.percentile(returns, confidence * 100) * 100
     
-    def calculate_beta(self, stock_returns, market_returns):
-        covariance = np.cov(stock_returns, market_returns)[0][1]
-        market_variance = np.var(market_returns)
-        return covariance / market_variance if market_variance != 0 else 0
-    
     def get_stock_summary(self):
         summary = {}
         returns_df = self.calculate_returns()
+        risk_free_rate = self.get_current_risk_free_rate()
         try:
-            spy = yf.Ticker('SPY').history(period='2y')
-            market_returns = spy['Close'].pct_change().dropna()
-        except:
-            market_returns = None
+            market_returns = self.market_model.fetch_factor_returns(period=self.data_period)
+            betas = self.market_model.fit(returns_df, market_returns)['beta_Market']
+        except Exception:
+            betas = pd.Series(dtype=float)
         
         for name, data in self.stock_data.items():
             current_price = data['Close'].iloc[-1]
@@ -99,15 +291,12 @@ class StockAnalyzer:
             total_return = ((current_price - start_price) / start_price) * 100
             stock_returns = returns_df[name]
             volatility = stock_returns.std() * np.sqrt(250) * 100
-            sharpe_ratio = self.calculate_sharpe_ratio(stock_returns)
+            sharpe_ratio = self.calculate_sharpe_ratio(stock_returns, risk_free_rate)
             max_drawdown = self.calculate_max_drawdown(data['Close'])
             var_95 = self.calculate_var(stock_returns)
-            beta = None
-            if market_returns is not None and len(stock_returns) > 0:
-                aligned_stock = stock_returns.reindex(market_returns.index).dropna()
-                aligned_market = market_returns.reindex(aligned_stock.index).dropna()
-                if len(aligned_stock) > 20:
-                    beta = self.calculate_beta(aligned_stock, aligned_market)
+            beta = betas.get(name)
+            if beta is not None and np.isnan(beta):
+                beta = None
             annualized_return = ((1 + stock_returns.mean()) ** 250 - 1) * 100
             win_rate = (stock_returns > 0).sum() / len(stock_returns) * 100
             
@@ -190,8 +379,9 @@ class StockAnalyzer:
         
         return fig
     
-    def create_correlation_heatmap(self):
-        corr_matrix = self.calculate_correlation_matrix()
+    def create_correlation_heatmap(self, corr_matrix=None):
+        if corr_matrix is None:
+            corr_matrix = self.calculate_correlation_matrix()
         
         fig = go.Figure(data=go.Heatmap(
             z=corr_matrix.values,
@@ -217,10 +407,44 @@ class StockAnalyzer:
         )
         return fig
     
-    def create_volatility_chart(self):
-        summary = self.get_stock_summary()
+    def figure_to_store(self, fig):
+        figure = fig.to_dict()
+        # Plain lists so the clientside callbacks can slice the arrays directly
+        for trace_dict, trace in zip(figure['data'], fig.data):
+            for attr in ('x', 'y', 'z', 'text'):
+                if attr in trace_dict:
+                    trace_dict[attr] = np.asarray(getattr(trace, attr)).tolist()
+        return figure
+    
+    def get_chart_store_data(self):
+        if not self.stock_data:
+            return {}
+        version = (self.data_version, tuple(self.stock_data.keys()))
+        cached = self._cache.get('chart_store')
+        if cached is None or cached[0] != version:
+            cached = self._cache['chart_store'] = (version, {
+                'data_version': self.data_version,
+                'time_series': self.figure_to_store(self.create_time_series_chart(normalize=False))
+            })
+        return cached[1]
+    
+    def get_correlation_store_data(self, start_date=None, end_date=None):
+        if not self.stock_data:
+            return {}
+        corr_matrix = self.calculate_window_correlation(start_date, end_date)
+        return {
+            'data_version': self.data_version,
+            'correlation': self.figure_to_store(self.create_correlation_heatmap(corr_matrix))
+        }
+    
+    def create_volatility_chart(self, summary=None):
+        if summary is None:
+            summary = self.get_stock_summary()
         
-        stocks = list(summary.keys())
+        # Tickers without enough data in the window can't be placed on the chart
+        stocks = [stock for stock in summary
+                  if np.isfinite([summary[stock][key] for key in
+                                  ('volatility', 'annualized_return', 'sharpe_ratio')]).all()]
         volatilities = [summary[stock]['volatility'] for stock in stocks]
         returns = [summary[stock]['annualized_return'] for stock in stocks]
         sharpe_ratios = [summary[stock]['sharpe_ratio'] for stock in stocks]
@@ -271,8 +495,9 @@ class StockAnalyzer:
         
         return fig
     
-    def create_performance_metrics_chart(self):
-        summary = self.get_stock_summary()
+    def create_performance_metrics_chart(self, summary=None):
+        if summary is None:
+            summary = self.get_stock_summary()
         metrics_data = []
         for stock, data in summary.items():
             metrics_data.append({
@@ -335,19 +560,23 @@ class StockAnalyzer:
         
         return fig
     
+    def calculate_portfolio_returns(self, returns_df, weights=None):
+        if weights is None:
+            weights = np.array([1/len(returns_df.columns)] * len(returns_df.columns))
+        return (returns_df * weights).sum(axis=1)
+    
     def calculate_portfolio_metrics(self, weights=None):
 
         returns_df = self.calculate_returns()
         
         if weights is None:
             weights = np.array([1/len(returns_df.columns)] * len(returns_df.columns))
-        portfolio_returns = (returns_df * weights).sum(axis=1)
+        portfolio_returns = self.calculate_portfolio_returns(returns_df, weights)
         portfolio_return = portfolio_returns.mean() * 250 * 100
         portfolio_volatility = portfolio_returns.std() * np.sqrt(250) * 100
         portfolio_sharpe = self.calculate_sharpe_ratio(portfolio_returns)
         portfolio_var = self.calculate_var(portfolio_returns)
-        portfolio_cumulative = (1 + portfolio_returns).cumprod()
-        portfolio_max_dd = self.calculate_max_drawdown(portfolio_cumulative)
+        portfolio_max_dd = self.calculate_max_drawdown(self.calculate_wealth_curve(portfolio_returns))
         
         return {
             'portfolio_return': portfolio_return,
@@ -358,6 +587,42 @@ class StockAnalyzer:
             'diversification_ratio': self.calculate_diversification_ratio(returns_df, weights)
         }
     
+    def calculate_factor_exposures(self, factors=None, rolling_window=None):
+        model = FactorModel(factors)
+        factor_returns = model.fetch_factor_returns(period=self.data_period)
+        returns_df = self.calculate_returns()
+        if rolling_window:
+            return model.rolling_betas(returns_df, factor_returns, window=rolling_window)
+        return model.fit(returns_df, factor_returns)
+    
+    def run_stress_test(self, weights=None, factor_shocks=None, horizon=21, names=None):
+        names = [name for name in (names or self.stock_data.keys()) if name in self.stock_data]
+        if weights is None:
+            weights = np.array([1/len(names)] * len(names))
+        factor_returns = factor_betas = None
+        if factor_shocks:
+            try:
+                factor_returns = self.stress_model.fetch_factor_returns(period=self.data_period)
+                factor_betas = self.stress_model.fit(self.calculate_returns()[names], factor_returns)
+            except Exception as e:
+                print(f"Could not fit stress factor model: {e}")
+        engine = ScenarioEngine(self.build_range_index(), names, factor_returns, factor_betas)
+        return engine, engine.run(weights, factor_shocks=factor_shocks, horizon=horizon)
+    
+    def get_drawdown_analysis(self, weights=None):
+        wealth = pd.DataFrame({name: data['Close'] for name, data in self.stock_data.items()})
+        portfolio_returns = self.calculate_portfolio_returns(self.calculate_returns(), weights)
+        wealth['Portfolio'] = self.calculate_wealth_curve(portfolio_returns)
+        return DrawdownAnalyzer(wealth)
+    
+    def backtest_strategies(self, weights_grid, frequency='monthly', transaction_cost=0.001,
+                            threshold=0.05, max_workers=None):
+        returns_df = self.calculate_returns()
+        start_date = min(data.index[0] for data in self.stock_data.values())
+        backtester = Backtester(returns_df, self.get_current_risk_free_rate(), start_date=start_date)
+        return backtester.run_grid(weights_grid, frequency=frequency, threshold=threshold,
+                                   transaction_cost=transaction_cost, max_workers=max_workers)
+    
     def calculate_diversification_ratio(self, returns_df, weights):
         individual_vols = returns_df.std() * np.sqrt(250)
         weighted_avg_vol = np.sum(weights * individual_vols)
@@ -0,0 +1,89 @@
+import gzip
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask
+
+import analytics_api
+from analytics_api import register_analytics_api
+from stock_analyzer import StockAnalyzer
+
+
+def make_prices(seed, dates):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, len(dates))))
+    return pd.DataFrame({'Close': close}, index=dates)
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    analyzer = StockAnalyzer()
+    dates = pd.bdate_range('2024-01-01', periods=300)
+    analyzer.major_stocks = {'A': 'A', 'B': 'B', 'C': 'C'}
+    analyzer.stock_data = {name: make_prices(i, dates) for i, name in enumerate(analyzer.major_stocks)}
+    market = make_prices(9, dates)['Close'].pct_change().dropna().rename('Market').to_frame()
+    monkeypatch.setattr(analyzer.market_model, 'fetch_factor_returns', lambda period: market)
+
+    # Each fetch sees a different live quote
+    quotes = iter([0.04, 0.05, 0.06])
+    analyzer.rate_fetches = []
+    monkeypatch.setattr(analyzer, '_fetch_risk_free_rate',
+                        lambda: analyzer.rate_fetches.append(None) or next(quotes))
+    analyzer.data_version = 1
+    analyzer.data_timestamp = datetime(2026, 10, 16, 18, 0)
+    return analyzer
+
+
+@pytest.fixture
+def client(analyzer):
+    app = Flask(__name__)
+    register_analytics_api(app, analyzer)
+    return app.test_client()
+
+
+def test_etag_round_trip(client):
+    response = client.get('/api/v1/summary?format=json')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    etag = response.headers['ETag']
+
+    cached = client.get('/api/v1/summary?format=json', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert client.get('/api/v1/summary?format=npz', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_gzip_negotiation(client):
+    plain = client.get('/api/v1/returns?format=json')
+    compressed = client.get('/api/v1/returns?format=json', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert compressed.headers['ETag'] != plain.headers['ETag']
+    assert client.get('/api/v1/returns?format=json', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']}).status_code == 304
+
+
+def test_unsupported_format_and_missing_pyarrow(client, monkeypatch):
+    assert client.get('/api/v1/summary?format=xml').status_code == 400
+    monkeypatch.setattr(analytics_api, 'pa', None)
+    response = client.get('/api/v1/summary?format=arrow')
+    assert response.status_code == 406
+    assert 'pyarrow' in response.get_json()['error']
+
+
+def test_risk_free_rate_is_pinned_per_data_version(client, analyzer):
+    first = client.get('/api/v1/summary?format=json')
+    portfolio = client.get('/api/v1/portfolio?format=json').get_json()
+    assert len(analyzer.rate_fetches) == 1
+    expected = analyzer.calculate_sharpe_ratio(
+        analyzer.calculate_portfolio_returns(analyzer.calculate_returns()), 0.04)
+    assert portfolio['value'][portfolio['metric'].index('portfolio_sharpe')] == pytest.approx(expected)
+
+    analyzer.data_version += 1
+    second = client.get('/api/v1/summary?format=json')
+    assert len(analyzer.rate_fetches) == 2
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert second.get_json()['sharpe_ratio'] != first.get_json()['sharpe_ratio']
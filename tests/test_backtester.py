@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask
+
+from analytics_api import BACKTEST_STRATEGIES, register_analytics_api
+from backtester import Backtester, random_weight_grid
+from stock_analyzer import StockAnalyzer
+
+
+@pytest.fixture
+def returns_df():
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range('2024-01-01', periods=260)
+    values = rng.normal(0.0004, 0.015, (len(dates), 4))
+    values[:30, 3] = np.nan
+    return pd.DataFrame(values, index=dates, columns=['A', 'B', 'C', 'D'])
+
+
+def test_daily_rebalance_without_costs_matches_fixed_weights(returns_df):
+    grid = random_weight_grid(4, 5, seed=1)
+    result = Backtester(returns_df).run(grid, frequency='daily', transaction_cost=0.0)
+    analyzer = StockAnalyzer()
+    for i, name in enumerate(result['returns'].columns):
+        expected = analyzer.calculate_portfolio_returns(returns_df, grid[i])
+        np.testing.assert_allclose(result['returns'][name], expected, atol=1e-12)
+
+
+@pytest.mark.parametrize('frequency', ['daily', 'weekly', 'monthly'])
+def test_turnover_follows_rebalance_schedule(returns_df, frequency):
+    backtester = Backtester(returns_df)
+    schedule = backtester.rebalance_schedule(frequency)
+    turnover = backtester.run(random_weight_grid(4, 3, seed=2), frequency=frequency)['turnover']
+    for name in turnover.columns:
+        np.testing.assert_array_equal(turnover[name].to_numpy() > 0, schedule)
+    if frequency == 'monthly':
+        assert schedule.sum() == returns_df.index.to_period('M').nunique() - 1
+
+
+def test_run_grid_across_processes_matches_single_run(returns_df):
+    backtester = Backtester(returns_df, risk_free_rate=0.03)
+    grid = random_weight_grid(4, 30, seed=3)
+    pooled = backtester.run_grid(grid, max_workers=2, chunk_size=8, frequency='threshold')
+    single = backtester.run(grid, frequency='threshold')
+    for key in ('equity_curves', 'returns', 'turnover', 'metrics'):
+        pd.testing.assert_frame_equal(pooled[key], single[key])
+
+
+def test_backtest_endpoint(returns_df, monkeypatch):
+    analyzer = StockAnalyzer()
+    analyzer.major_stocks = {name: name for name in returns_df.columns}
+    analyzer.stock_data = {name: pd.DataFrame({'Close': 100 * (1 + returns_df[name].fillna(0)).cumprod()})
+                           for name in returns_df.columns}
+    monkeypatch.setattr(analyzer, 'get_current_risk_free_rate', lambda: 0.04)
+    app = Flask(__name__)
+    register_analytics_api(app, analyzer)
+
+    payload = app.test_client().get('/api/v1/backtest?format=json').get_json()
+    assert len(payload['strategy']) == BACKTEST_STRATEGIES
+    assert payload['weight_A'][0] == pytest.approx(0.25)
+    assert {'portfolio_sharpe', 'annual_turnover'} <= set(payload)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from drawdown_analyzer import DrawdownAnalyzer
+
+
+def brute_force_episodes(underwater):
+    rows = []
+    dates = underwater.index
+    for name in underwater.columns:
+        dd = underwater[name].fillna(0.0).to_numpy()
+        start = None
+        for i, value in enumerate(list(dd) + [0.0]):
+            if value < 0 and start is None:
+                start, trough = i, i
+            elif value < 0 and value < dd[trough]:
+                trough = i
+            elif value >= 0 and start is not None:
+                recovered = i < len(dd)
+                rows.append({
+                    'series': name,
+                    'peak_date': dates[start - 1],
+                    'trough_date': dates[trough],
+                    'recovery_date': dates[i] if recovered else pd.NaT,
+                    'depth': dd[trough] * 100,
+                    'recovered': recovered
+                })
+                start = None
+    return pd.DataFrame(rows)
+
+
+def test_episode_index_matches_brute_force():
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range('2024-01-01', periods=400)
+    wealth = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), 3)), axis=0)),
+                          index=dates, columns=['A', 'B', 'C'])
+    wealth.iloc[:50, 1] = np.nan
+    wealth.iloc[200:210, 0] = np.nan
+    # C ends below its peak, leaving its last episode open
+    wealth.iloc[-20:, 2] = wealth['C'].max() * 0.5
+
+    episodes = DrawdownAnalyzer(wealth).get_episode_index()
+    expected = brute_force_episodes(DrawdownAnalyzer(wealth).underwater)
+
+    assert len(episodes) == len(expected) > 10
+    assert not episodes[episodes['series'] == 'C']['recovered'].iloc[-1]
+    assert episodes[episodes['series'] == 'B']['peak_date'].min() >= dates[50]
+    for column in ('series', 'peak_date', 'trough_date', 'recovery_date', 'recovered'):
+        assert episodes[column].tolist() == expected[column].tolist(), column
+    np.testing.assert_allclose(episodes['depth'], expected['depth'])
+
+
+def test_episode_index_without_drawdowns_is_typed():
+    dates = pd.bdate_range('2024-01-01', periods=10)
+    wealth = pd.DataFrame({'A': np.linspace(1, 2, 10), 'B': np.nan}, index=dates)
+    analyzer = DrawdownAnalyzer(wealth)
+    episodes = analyzer.get_episode_index()
+
+    assert episodes.empty
+    assert pd.api.types.is_datetime64_any_dtype(episodes['peak_date'])
+    assert pd.api.types.is_datetime64_any_dtype(episodes['recovery_date'])
+    assert episodes['depth'].dtype == float
+    assert episodes['duration_days'].dtype == np.int64
+    assert episodes['recovered'].dtype == bool
+    summary = analyzer.get_drawdown_summary()
+    assert summary['episode_count'].tolist() == [0, 0]
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from factor_model import FactorModel, TRADING_DAYS
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range('2024-01-01', periods=300)
+    factors = pd.DataFrame(rng.normal(0, 0.01, (len(dates), 2)), index=dates, columns=['Market', 'Size'])
+    loadings = np.array([[1.2, 0.3], [0.8, -0.5], [1.0, 0.0]])
+    returns = pd.DataFrame(factors.to_numpy() @ loadings.T + rng.normal(0.0002, 0.01, (len(dates), 3)),
+                           index=dates, columns=['A', 'B', 'C'])
+    # Different histories: B listed late, C has gaps
+    returns.iloc[:120, 1] = np.nan
+    returns.iloc[rng.random(len(dates)) < 0.1, 2] = np.nan
+    return returns, factors
+
+
+def test_fit_matches_lstsq_per_ticker(data):
+    returns, factors = data
+    results = FactorModel().fit(returns, factors)
+
+    for name in returns.columns:
+        observed = returns[name].notna()
+        X = np.column_stack([np.ones(observed.sum()), factors[observed].to_numpy()])
+        y = returns.loc[observed, name].to_numpy()
+        coefs, _, _, _ = np.linalg.lstsq(X, y, rcond=None)
+        residuals = y - X @ coefs
+        sigma2 = residuals @ residuals / (len(y) - X.shape[1])
+        t_stats = coefs / np.sqrt(sigma2 * np.diag(np.linalg.inv(X.T @ X)))
+        r_squared = 1 - residuals @ residuals / ((y - y.mean()) @ (y - y.mean()))
+
+        row = results.loc[name]
+        assert row['observations'] == len(y)
+        np.testing.assert_allclose(row['alpha'], coefs[0] * TRADING_DAYS * 100, rtol=1e-8)
+        np.testing.assert_allclose(row[['beta_Market', 'beta_Size']].to_numpy(dtype=float), coefs[1:], rtol=1e-8)
+        np.testing.assert_allclose(row[['t_alpha', 't_Market', 't_Size']].to_numpy(dtype=float), t_stats, rtol=1e-8)
+        np.testing.assert_allclose(row['r_squared'], r_squared, rtol=1e-8)
+
+
+def test_rolling_betas_match_per_window_refit(data):
+    returns, factors = data
+    model = FactorModel()
+    window = 60
+    rolling = model.rolling_betas(returns, factors, window=window)
+
+    for end in range(window, len(returns) + 1, 7):
+        refit = model.fit(returns.iloc[end - window:end], factors.iloc[end - window:end])
+        date = returns.index[end - 1]
+        for name in factors.columns:
+            np.testing.assert_allclose(rolling[name].loc[date].to_numpy(dtype=float),
+                                       refit[f'beta_{name}'].to_numpy(dtype=float), rtol=1e-6, atol=1e-9)
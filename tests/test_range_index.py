@@ -0,0 +1,139 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from range_index import ReturnRangeIndex
+from stock_analyzer import StockAnalyzer
+
+PREFIX_ARRAYS = ('_count', '_sum', '_sum_sq', '_sum_log', '_pair_count', '_pair_sum', '_pair_sum_sq', '_cross')
+
+
+def make_prices(seed, dates):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, len(dates))))
+    return pd.DataFrame({'Close': close}, index=dates)
+
+
+def assert_same_index(incremental, rebuilt):
+    # Compared by name: an incremental add appends its column after 'Market'
+    names = list(rebuilt.columns)
+    assert sorted(incremental.columns) == sorted(names)
+    assert incremental.index.equals(rebuilt.index)
+    for start, end in [(None, None), ('2024-03-01', '2024-09-30'), ('2024-11-16', '2024-11-16')]:
+        pd.testing.assert_frame_equal(incremental.get_window_stats(start, end, names),
+                                      rebuilt.get_window_stats(start, end, names))
+        pd.testing.assert_frame_equal(incremental.get_window_correlation(start, end, names),
+                                      rebuilt.get_window_correlation(start, end, names))
+
+
+@pytest.fixture
+def returns_df():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2024-01-01', periods=300)
+    values = rng.normal(0.0005, 0.015, (len(dates), 4))
+    values[:40, 1] = np.nan
+    values[rng.random(values.shape) < 0.02] = np.nan
+    return pd.DataFrame(values, index=dates, columns=['A', 'B', 'C', 'D'])
+
+
+def test_add_series_matches_rebuild(returns_df):
+    index = ReturnRangeIndex(returns_df[['A', 'B', 'C']])
+    index.add_series('D', returns_df['D'].dropna())
+    rebuilt = ReturnRangeIndex(returns_df)
+    for name in PREFIX_ARRAYS:
+        np.testing.assert_allclose(getattr(index, name), getattr(rebuilt, name))
+    assert_same_index(index, rebuilt)
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    analyzer = StockAnalyzer()
+    dates = pd.bdate_range('2024-01-01', periods=300, tz='America/New_York')
+    analyzer.major_stocks = {'A': 'A', 'B': 'B'}
+    analyzer.stock_data = {'A': make_prices(1, dates), 'B': make_prices(2, dates[20:])}
+    market = make_prices(3, dates)['Close'].pct_change().dropna().rename('Market').to_frame()
+    monkeypatch.setattr(analyzer.market_model, 'fetch_factor_returns', lambda period: market)
+    analyzer.data_version = 1
+    return analyzer
+
+
+@pytest.mark.parametrize('dates, extended', [
+    (pd.bdate_range('2024-02-01', periods=200, tz='America/New_York'), True),
+    (pd.bdate_range('2024-02-01', periods=200, tz='America/New_York').append(
+        pd.DatetimeIndex([pd.Timestamp('2024-11-16', tz='America/New_York')])), False),
+    (pd.bdate_range('2024-02-01', periods=200, tz='Europe/Berlin'), True)
+], ids=['subset', 'extra-session', 'other-timezone'])
+def test_add_stock_matches_rebuild(analyzer, dates, extended):
+    analyzer.build_range_index()
+    analyzer.add_stock('NEW', 'NEW', make_prices(4, dates))
+    assert (analyzer._cache.get('range_index') is not None) == extended
+    incremental = analyzer.build_range_index()
+
+    analyzer._cache.clear()
+    rebuilt = analyzer.build_range_index()
+    assert_same_index(incremental, rebuilt)
+    assert rebuilt.get_window_stats(names=['NEW'])['trading_days'].iloc[0] == len(dates) - 1
+
+
+def test_correlation_matches_pandas_with_and_without_pairwise_arrays(returns_df):
+    window = returns_df.loc['2024-03-01':'2024-04-15']
+    expected = window.corr()
+    for max_pairwise_series in (10, 2):
+        index = ReturnRangeIndex(returns_df, max_pairwise_series=max_pairwise_series)
+        assert index.pairwise == (max_pairwise_series == 10)
+        corr = index.get_window_correlation('2024-03-01', '2024-04-15')
+        np.testing.assert_allclose(corr.to_numpy(), expected.to_numpy(), atol=1e-5)
+
+
+def test_add_series_past_pairwise_limit_matches_rebuild(returns_df):
+    index = ReturnRangeIndex(returns_df[['A', 'B', 'C']], max_pairwise_series=3)
+    index.add_series('D', returns_df['D'].dropna())
+    assert not index.pairwise
+    assert_same_index(index, ReturnRangeIndex(returns_df, max_pairwise_series=3))
+
+
+def test_empty_window_has_no_total_return(returns_df):
+    stats = ReturnRangeIndex(returns_df).get_window_stats('2024-01-01', '2024-02-15', ['B'])
+    assert stats.loc['B', 'trading_days'] == 0
+    assert np.isnan(stats.loc['B', 'total_return'])
+
+
+@pytest.mark.parametrize('start, end, days', [
+    ('2024-01-01', '2024-02-15', 0),
+    ('2024-03-01', '2024-03-01', 1)
+], ids=['empty', 'one-row'])
+def test_short_window_has_no_volatility_or_sharpe(returns_df, start, end, days):
+    stats = ReturnRangeIndex(returns_df).get_window_stats(start, end, ['A', 'B'])
+    short = stats.loc['B'] if days == 0 else stats.loc['A']
+    assert short['trading_days'] == days
+    assert np.isnan(short['volatility'])
+    assert np.isnan(short['sharpe_ratio'])
+
+    stats['beta'] = np.nan
+    fig = StockAnalyzer().create_volatility_chart(summary=stats.to_dict('index'))
+    assert len(fig.data[0].x) == int(np.isfinite(stats['sharpe_ratio']).sum())
+
+
+def test_rebuild_does_not_hold_the_analyzer_lock(analyzer, monkeypatch):
+    fetching, release = threading.Event(), threading.Event()
+    market = analyzer.market_model.fetch_factor_returns(period=analyzer.data_period)
+
+    def slow_fetch(period):
+        fetching.set()
+        release.wait(5)
+        return market
+
+    monkeypatch.setattr(analyzer.market_model, 'fetch_factor_returns', slow_fetch)
+    builder = threading.Thread(target=analyzer.build_range_index)
+    builder.start()
+    assert fetching.wait(5)
+    snapshot = threading.Thread(target=analyzer.snapshot)
+    snapshot.start()
+    snapshot.join(1)
+    blocked = snapshot.is_alive()
+    release.set()
+    builder.join(5)
+    assert not blocked
+    assert 'Market' in analyzer._cache['range_index'][1].columns
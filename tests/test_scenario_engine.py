@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from range_index import ReturnRangeIndex
+from scenario_engine import ScenarioEngine
+
+
+@pytest.fixture
+def returns_df():
+    rng = np.random.default_rng(5)
+    dates = pd.bdate_range('2024-06-03', periods=120)
+    values = rng.normal(0.0003, 0.02, (len(dates), 3))
+    return pd.DataFrame(values, index=dates, columns=['A', 'B', 'C'])
+
+
+def test_historical_replay_pnl_matches_compounded_returns(returns_df):
+    weights = np.array([0.5, 0.3, 0.2])
+    window = ('2024-07-16', '2024-08-05')
+    engine = ScenarioEngine(ReturnRangeIndex(returns_df), ['A', 'B', 'C'])
+    results = engine.run(weights, historical={'Replay': window})['results']
+
+    replay = results[results['scenario'] == 'Replay'].iloc[0]
+    growth = (1 + returns_df.loc[window[0]:window[1]]).prod() - 1
+    assert replay['pnl'] == pytest.approx(growth.to_numpy() @ weights * 100, rel=1e-9)
+    assert replay['coverage'] == pytest.approx(100)
+
+
+def test_run_without_any_scenarios(returns_df):
+    engine = ScenarioEngine(ReturnRangeIndex(returns_df.iloc[:10]), ['A', 'B', 'C'])
+    stress = engine.run(np.full(3, 1 / 3), horizon=21, historical={})
+
+    assert stress['results'].empty
+    assert stress['summary']['scenario_count'] == 0
+    assert np.isnan(stress['summary']['worst'])
+    engine.create_scenario_chart(stress)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analyzer import StockAnalyzer
+
+
+def make_prices(seed, dates):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, len(dates))))
+    return pd.DataFrame({'Close': close}, index=dates)
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    analyzer = StockAnalyzer(memory_budget_mb=0.01, cache_dir=str(tmp_path))
+    analyzer.major_stocks = {name: name for name in 'ABCDEF'}
+    analyzer.stock_data.symbols = analyzer.major_stocks
+    dates = pd.bdate_range('2024-01-01', periods=300, tz='America/New_York')
+    for i, name in enumerate(analyzer.major_stocks):
+        analyzer.stock_data.save(name, make_prices(i, dates[i * 10:]))
+    market = make_prices(99, dates)['Close'].pct_change().dropna().rename('Market').to_frame()
+    monkeypatch.setattr(analyzer.market_model, 'fetch_factor_returns', lambda period: market)
+    analyzer.data_version = 1
+
+    loads = []
+    load = analyzer.ticker_store.load
+    monkeypatch.setattr(analyzer.ticker_store, 'load', lambda symbol: loads.append(symbol) or load(symbol))
+    analyzer.loads = loads
+    return analyzer
+
+
+def test_narrowed_snapshot_only_loads_selected_tickers(analyzer):
+    view = analyzer.snapshot(names=['B', 'D', 'missing'])
+    assert list(view.stock_data) == ['B', 'D']
+    stats = view.get_window_statistics('2024-03-01', '2024-09-30')
+    assert list(stats.index) == ['B', 'D']
+    view.get_chart_store_data()
+    assert sorted(set(analyzer.loads)) == ['B', 'D']
+
+
+def test_history_bounds_do_not_load_saved_tickers(analyzer):
+    start, end = analyzer.get_history_bounds()
+    assert analyzer.loads == []
+    assert str(start) == '2024-01-01'
+    assert end == pd.bdate_range('2024-01-01', periods=300)[-1].date()
+
+
+def test_range_index_is_reported_outside_the_budget(analyzer):
+    analyzer.snapshot(names=list('ABCDEF')).build_range_index()
+    usage = analyzer.get_memory_usage()
+    assert usage['used_mb'] <= usage['budget_mb'] or usage['resident_tickers'] == 1
+    assert usage['range_index_mb'] > usage['budget_mb']
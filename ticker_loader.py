@@ -0,0 +1,94 @@
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+SYMBOL_PATTERN = re.compile(r'^[A-Za-z0-9.\-^=]{1,15}$')
+MAX_TRACKED_JOBS = 100
+
+
+class TickerLoader:
+    def __init__(self, analyzer, max_workers=2):
+        self.analyzer = analyzer
+        self.max_workers = max_workers
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created on first use so a preloaded app never forks with live threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='ticker-loader')
+            return self._executor
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def submit(self, symbol):
+        symbol = (symbol or '').strip().upper()
+        if not SYMBOL_PATTERN.match(symbol):
+            raise ValueError(f"Invalid ticker symbol: {symbol!r}")
+
+        job = {'symbol': symbol, 'name': symbol, 'status': 'queued', 'progress': 0,
+               'message': f"{symbol}: queued", 'from_cache': False}
+        view = self.analyzer.snapshot()
+        loaded = {view.major_stocks.get(name) for name in view.stock_data}
+        if symbol in loaded or symbol in view.stock_data:
+            job.update(status='done', progress=100, message=f"{symbol} is already loaded")
+
+        with self._lock:
+            # A symbol already queued or running shares the existing job
+            for job_id, existing in self._jobs.items():
+                if existing['symbol'] == symbol and existing['status'] in ('queued', 'running'):
+                    return job_id
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = job
+            while len(self._jobs) > MAX_TRACKED_JOBS:
+                self._jobs.popitem(last=False)
+        if job['status'] == 'queued':
+            self._get_executor().submit(self._load, job_id, symbol)
+        return job_id
+
+    def _load(self, job_id, symbol):
+        try:
+            self._update(job_id, status='running', progress=10, message=f"{symbol}: checking cache")
+            if not self.analyzer.ticker_store.is_fresh(symbol, self.analyzer.data_period,
+                                                       self.analyzer.max_cache_age_hours):
+                self._update(job_id, progress=30, message=f"{symbol}: downloading")
+            data, from_cache = self.analyzer.load_ticker_data(symbol)
+            if data is None or data.empty:
+                self._update(job_id, status='error', progress=100,
+                             message=f"{symbol}: no data found")
+                return
+
+            self._update(job_id, progress=85, from_cache=from_cache, message=f"{symbol}: merging")
+            if not self.analyzer.add_stock(symbol, symbol, data):
+                self._update(job_id, status='done', progress=100, message=f"{symbol} is already loaded")
+                return
+            source = 'cache' if from_cache else 'download'
+            self._update(job_id, status='done', progress=100,
+                         message=f"{symbol}: loaded {len(data)} days from {source}")
+            print(f"Added {symbol} from {source}")
+        except Exception as e:
+            print(f"Error loading {symbol}: {e}")
+            self._update(job_id, status='error', progress=100, message=f"{symbol}: {e}")
+
+    def restore(self):
+        # Tickers added at runtime by an earlier worker; a recycled worker
+        # forks from the preloaded app, which doesn't have them
+        try:
+            added = self.analyzer.ticker_store.load_added_tickers()
+        except Exception as e:
+            print(f"Could not read added tickers: {e}")
+            return []
+        return [self.submit(symbol) for name, symbol in added.items()
+                if name not in self.analyzer.stock_data]
+
+    def get_status(self, job_ids):
+        with self._lock:
+            return {job_id: dict(self._jobs[job_id]) for job_id in job_ids if job_id in self._jobs}
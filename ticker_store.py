@@ -0,0 +1,185 @@
+import copy
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = '.stock_cache'
+ADDED_TICKERS_FILE = 'added_tickers.json'
+STORED_COLUMNS = ('Close',)
+STORED_DTYPE = np.float32
+
+
+class TickerStore:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, symbol):
+        return os.path.join(self.cache_dir, re.sub(r'[^A-Za-z0-9._^-]', '_', symbol) + '.npz')
+
+    def has(self, symbol):
+        return os.path.exists(self._path(symbol))
+
+    def is_fresh(self, symbol, period, max_age_hours):
+        if not self.has(symbol):
+            return False
+        if time.time() - os.path.getmtime(self._path(symbol)) > max_age_hours * 3600:
+            return False
+        with np.load(self._path(symbol)) as arrays:
+            return str(arrays['period']) == period
+
+    def save(self, symbol, data, period=''):
+        index = pd.DatetimeIndex(data.index)
+        tz = str(index.tz) if index.tz is not None else ''
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        arrays = {
+            'dates': index.to_numpy(dtype='datetime64[ns]').view(np.int64),
+            'tz': np.array(tz),
+            'period': np.array(period)
+        }
+        for column in STORED_COLUMNS:
+            arrays[column] = data[column].to_numpy(dtype=STORED_DTYPE)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a unique temp file then rename, so readers never see a
+        # half-written file and concurrent saves of one symbol don't collide
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='.tmp.npz', delete=False) as handle:
+            tmp_path = handle.name
+            np.savez(handle, **arrays)
+        try:
+            os.replace(tmp_path, self._path(symbol))
+        except OSError:
+            os.remove(tmp_path)
+            raise
+
+    def load_added_tickers(self):
+        path = os.path.join(self.cache_dir, ADDED_TICKERS_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as handle:
+            return json.load(handle)
+
+    def save_added_tickers(self, tickers):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=self.cache_dir, suffix='.tmp.json', delete=False) as handle:
+            tmp_path = handle.name
+            json.dump(tickers, handle)
+        os.replace(tmp_path, os.path.join(self.cache_dir, ADDED_TICKERS_FILE))
+
+    def load(self, symbol):
+        with np.load(self._path(symbol)) as arrays:
+            index = pd.DatetimeIndex(arrays['dates'].view('datetime64[ns]'))
+            tz = str(arrays['tz'])
+            if tz:
+                index = index.tz_localize('UTC').tz_convert(tz)
+            return pd.DataFrame({column: arrays[column] for column in STORED_COLUMNS}, index=index)
+
+
+class LazyStockData(MutableMapping):
+    def __init__(self, symbols, store, memory_budget_mb):
+        self.symbols = symbols
+        self.store = store
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._names = {}
+        self._resident = OrderedDict()
+        self._sizes = {}
+        # First and last date per ticker, remembered on save and load so the
+        # history range doesn't need every ticker resident
+        self._bounds = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def compact(data):
+        return pd.DataFrame({column: data[column].astype(STORED_DTYPE) for column in STORED_COLUMNS},
+                            index=data.index)
+
+    def _evict(self, keep):
+        while self.memory_used() > self.memory_budget and len(self._resident) > 1:
+            name = next(iter(self._resident))
+            if name == keep:
+                self._resident.move_to_end(name)
+                continue
+            del self._resident[name]
+            del self._sizes[name]
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name in self._resident:
+                self._resident.move_to_end(name)
+                return self._resident[name]
+            if name not in self._names:
+                raise KeyError(name)
+            data = self.store.load(self.symbols[name])
+            self._resident[name] = data
+            self._sizes[name] = int(data.memory_usage(index=True).sum())
+            self._bounds[name] = (data.index[0], data.index[-1])
+            self._evict(keep=name)
+            return data
+
+    def __setitem__(self, name, data):
+        self.save(name, data)
+
+    def save(self, name, data, period=''):
+        with self._lock:
+            self.store.save(self.symbols[name], self.compact(data), period=period)
+            self._names[name] = None
+            self._resident.pop(name, None)
+            self._sizes.pop(name, None)
+            self._bounds[name] = (data.index[0], data.index[-1])
+
+    def register(self, name):
+        with self._lock:
+            if name not in self._names and self.store.has(self.symbols[name]):
+                self._names[name] = None
+                return True
+            return False
+
+    def __delitem__(self, name):
+        with self._lock:
+            del self._names[name]
+            self._resident.pop(name, None)
+            self._sizes.pop(name, None)
+            self._bounds.pop(name, None)
+
+    def snapshot(self, names=None):
+        # Frozen ticker list over the shared resident cache and budget,
+        # optionally narrowed to some of the tickers
+        with self._lock:
+            view = copy.copy(self)
+            view._names = {name: None for name in (self._names if names is None else names)
+                           if name in self._names}
+            return view
+
+    def get_bounds(self):
+        missing = [name for name in self._names if name not in self._bounds]
+        for name in missing:
+            self[name]
+        with self._lock:
+            return {name: self._bounds[name] for name in self._names if name in self._bounds}
+
+    def __iter__(self):
+        return iter(list(self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def memory_used(self):
+        return sum(self._sizes.values())
+
+    def get_memory_usage(self):
+        with self._lock:
+            return {
+                'used_mb': self.memory_used() / (1024 * 1024),
+                'budget_mb': self.memory_budget / (1024 * 1024),
+                'resident_tickers': len(self._resident),
+                'total_tickers': len(self._names)
+            }